@@ -1,39 +1,1012 @@
-from fastapi import APIRouter, UploadFile, File, Form
-from app.btec_engine.text_evaluator import evaluate_text
-from app.btec_engine.audio_evaluator import transcribe_audio
-import tempfile
-import os
+import asyncio
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+from fastapi import (
+    APIRouter,
+    UploadFile,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+    WebSocketException,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlmodel import Session, func, select
+from app.btec_engine.text_evaluator import (
+    METRIC_VERSION,
+    CascadeProfile,
+    evaluate_text,
+    evaluate_text_batch,
+    evaluate_text_bounded,
+    evaluate_text_cascade,
+    evaluate_text_segments,
+    match_segments,
+)
+from app.btec_engine.audio_evaluator import (
+    BATCH_WINDOW_SECONDS,
+    LANGUAGE,
+    SAMPLE_RATE,
+    AudioSource,
+    load_audio,
+    model_stats,
+    plan_chunks,
+    plan_file_chunks,
+    stitch_segments,
+    transcribe_batch,
+    transcribe_chunk,
+    transcribe_clip,
+)
+from app.btec_engine.plagiarism import find_suspicious_clusters
+from app.btec_engine.streaming import RollingWindow, pcm16_to_float
+from app.btec_engine.fingerprint_index import FingerprintIndex
+from app.btec_engine.cache import ResultCache, content_key, normalize_answer
+from app import crud
+from app.api.deps import SessionDep
+from app.api.uploads import SpooledUpload, spool_upload
+from app.core.batching import MicroBatcher, SingleFlight
+from app.core.config import settings
+from app.core.db import engine
+from app.core.executor import (
+    EvaluationPool,
+    PoolSaturatedError,
+    evaluation_pool,
+    report_pool,
+    transcription_pool,
+)
+from app.core.exports import iter_csv, iter_xlsx
+from app.core.jobs import transcription_jobs
+from app.core.reports import (
+    ARCHIVE_NAME,
+    booklet_path,
+    build_booklet,
+    follow_file,
+    log_booklet_failure,
+    report_batches,
+    report_filename,
+)
+from app.models import (
+    FingerprintCheck,
+    ModelAnswer,
+    ModelAnswerCreate,
+    ModelAnswerPublic,
+    ModelAnswersPublic,
+    PlagiarismCheck,
+    ReportBatch,
+    ReportBatchCreate,
+    ReportBatchPublic,
+    ReportFile,
+    StudentReport,
+    TextBatchEvaluate,
+    TranscriptionJob,
+    TranscriptionJobPublic,
+)
 
 router = APIRouter()
 
+evaluation_cache = ResultCache(
+    max_bytes=settings.BTEC_CACHE_MAX_BYTES,
+    db_path=settings.BTEC_CACHE_DB_PATH,
+    max_disk_entries=settings.BTEC_CACHE_DISK_MAX_ENTRIES,
+)
+
+fingerprint_index = FingerprintIndex(settings.BTEC_FINGERPRINT_INDEX_DIR)
+
+
+async def _transcribe_batch(
+    items: list[tuple[AudioSource, bool, str]],
+) -> list[dict | Exception]:
+    # One decode pass per model; requests for different tiers share a batch
+    # window but not a model.
+    by_model: dict[str, list[int]] = {}
+    for idx, (_, _, model_name) in enumerate(items):
+        by_model.setdefault(model_name, []).append(idx)
+
+    async def run_model(model_name: str, indexes: list[int]) -> list:
+        return await transcription_pool.run(
+            transcribe_batch,
+            [items[idx][0] for idx in indexes],
+            model_name,
+            [items[idx][1] for idx in indexes],
+        )
+
+    outputs = await asyncio.gather(
+        *(run_model(name, indexes) for name, indexes in by_model.items())
+    )
+    results: list[dict | Exception] = [{} for _ in items]
+    for indexes, output in zip(by_model.values(), outputs, strict=True):
+        for idx, result in zip(indexes, output, strict=True):
+            results[idx] = result
+    return results
+
+
+transcription_batcher = MicroBatcher(
+    _transcribe_batch,
+    max_batch_size=settings.BTEC_TRANSCRIBE_BATCH_SIZE,
+    max_wait_seconds=settings.BTEC_TRANSCRIBE_BATCH_WAIT_MS / 1000,
+)
+
+
+def whisper_model_for_tier(tier: str | None) -> str:
+    if tier is None:
+        return settings.BTEC_WHISPER_MODEL
+    try:
+        return settings.BTEC_WHISPER_TIER_MODELS[tier]
+    except KeyError:
+        tiers = ", ".join(sorted(settings.BTEC_WHISPER_TIER_MODELS))
+        raise HTTPException(
+            status_code=422, detail=f"Unknown tier, expected one of: {tiers}"
+        )
+
+
+def _plan_chunks(source: AudioSource, trim: bool) -> tuple[list[tuple[int, int]], int]:
+    # Files are planned from frame energies streamed out of ffmpeg; each
+    # transcription worker then decodes only its own chunk.
+    if isinstance(source, np.ndarray):
+        audio = load_audio(source)
+        chunks = plan_chunks(audio, settings.BTEC_TRANSCRIBE_CHUNK_SECONDS, trim)
+        return chunks, len(source)
+    return plan_file_chunks(source, settings.BTEC_TRANSCRIBE_CHUNK_SECONDS, trim)
+
+
+async def transcribe_chunked(
+    source: AudioSource,
+    trim: bool = False,
+    model_name: str = settings.BTEC_WHISPER_MODEL,
+    on_chunk: Callable[[list[dict]], None] | None = None,
+) -> dict:
+    """
+    Transcribe a long recording as silence-bounded chunks spread over the
+    transcription pool, then stitch the timestamped segments back together.
+    `on_chunk` is called with each chunk's segments as soon as it finishes.
+    """
+    chunks, total_samples = await run_in_threadpool(_plan_chunks, source, trim)
+    # Bounded per recording so one long upload cannot fill the pool queue.
+    limit = asyncio.Semaphore(settings.BTEC_TRANSCRIBE_CHUNK_CONCURRENCY)
+
+    async def run_chunk(start: int, end: int) -> dict:
+        offset = start / SAMPLE_RATE
+        async with limit:
+            if isinstance(source, np.ndarray):
+                result = await transcription_pool.run(
+                    transcribe_chunk, source[start:end], offset, model_name
+                )
+            else:
+                result = await transcription_pool.run(
+                    transcribe_chunk,
+                    source,
+                    offset,
+                    model_name,
+                    (end - start) / SAMPLE_RATE,
+                )
+        if on_chunk is not None:
+            on_chunk(result["segments"])
+        return result
+
+    tasks = [asyncio.ensure_future(run_chunk(start, end)) for start, end in chunks]
+    try:
+        chunk_results = await asyncio.gather(*tasks)
+    finally:
+        # A failed chunk fails the recording; the others must not go on
+        # calling `on_chunk` after the caller has cleaned up.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    transcribed = sum(end - start for start, end in chunks)
+    return {
+        **stitch_segments([result["segments"] for result in chunk_results]),
+        "trimmed_seconds": (total_samples - transcribed) / SAMPLE_RATE,
+        "chunks": len(chunks),
+        "profile": chunk_results[0]["profile"] if chunk_results else None,
+    }
+
+
+transcript_cache = ResultCache(
+    max_bytes=settings.BTEC_TRANSCRIPT_CACHE_MAX_BYTES,
+    db_path=settings.BTEC_TRANSCRIPT_CACHE_DB_PATH,
+    max_disk_bytes=settings.BTEC_TRANSCRIPT_CACHE_DISK_MAX_BYTES,
+    prune_every=100,
+)
+transcription_flights = SingleFlight()
+
+
+async def transcribe_upload(
+    upload: SpooledUpload,
+    trim: bool = False,
+    model_name: str = settings.BTEC_WHISPER_MODEL,
+    on_chunk: Callable[[list[dict]], None] | None = None,
+) -> dict:
+    """
+    Transcript of a spooled upload, served from the transcript cache when the
+    same audio was transcribed before. Concurrent uploads of identical audio
+    share one in-flight transcription, which takes over the spooled file of
+    the upload that started it so the audio outlives that request. `on_chunk`
+    only sees chunks that are actually transcribed for this call.
+    """
+    key = content_key(
+        "transcript",
+        upload.sha256,
+        model_name,
+        LANGUAGE,
+        f"trim={trim}",
+    )
+    result = await run_in_threadpool(transcript_cache.get, key)
+    if result is not None:
+        return result
+
+    source = upload.source
+    owned_path = None
+    if upload.audio is None and key not in transcription_flights:
+        # No await until the flight starts, so this call is the one starting
+        # it; the flight removes the file when it finishes.
+        upload.keep = True
+        owned_path = upload.path
+
+    async def transcribe_and_cache() -> dict:
+        try:
+            # Unknown durations go to the batch, which copes with long clips.
+            duration = upload.duration or 0.0
+            if duration > settings.BTEC_TRANSCRIBE_CHUNK_MIN_SECONDS:
+                result = await transcribe_chunked(source, trim, model_name, on_chunk)
+            elif duration > BATCH_WINDOW_SECONDS:
+                # Too long for the batched window; it would hold up the batch.
+                result = await transcription_pool.run(
+                    transcribe_clip, source, model_name, trim
+                )
+            else:
+                result = await transcription_batcher.submit((source, trim, model_name))
+            await run_in_threadpool(transcript_cache.put, key, result)
+            return result
+        finally:
+            if owned_path is not None:
+                owned_path.unlink(missing_ok=True)
+
+    try:
+        return await transcription_flights.run(key, transcribe_and_cache)
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=503, detail="Transcription queue is full, retry later"
+        )
+
+
+async def run_in_pool(fn, *args, pool: EvaluationPool = evaluation_pool):
+    try:
+        return await pool.run(fn, *args)
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=503, detail="Evaluation queue is full, retry later"
+        )
+
+
+def resolve_model_answer(
+    session: SessionDep,
+    model_answer: str | None,
+    model_answer_id: uuid.UUID | None,
+) -> tuple[str, dict[str, int] | None]:
+    """
+    Model answer text and, for stored model answers, its precomputed
+    character counts. Stored answers are scored on the text they were saved
+    with, exactly like the same answer sent inline.
+    """
+    if (model_answer is None) == (model_answer_id is None):
+        raise HTTPException(
+            status_code=422,
+            detail="Provide exactly one of model_answer or model_answer_id",
+        )
+    if model_answer_id is None:
+        return model_answer, None
+    stored = crud.get_model_answer(session=session, model_answer_id=model_answer_id)
+    if not stored:
+        raise HTTPException(status_code=404, detail="Model answer not found")
+    return stored.text, stored.char_counts
+
+
+@router.post("/model-answers", response_model=ModelAnswerPublic)
+def create_model_answer(session: SessionDep, model_answer_in: ModelAnswerCreate):
+    """
+    Store a model answer with its precomputed features.
+    """
+    return crud.create_model_answer(session=session, model_answer_in=model_answer_in)
+
+
+@router.get("/model-answers", response_model=ModelAnswersPublic)
+def read_model_answers(session: SessionDep, skip: int = 0, limit: int = 100):
+    """
+    Retrieve stored model answers.
+    """
+    count = session.exec(select(func.count()).select_from(ModelAnswer)).one()
+    model_answers = session.exec(
+        select(ModelAnswer).order_by(ModelAnswer.created_at).offset(skip).limit(limit)
+    ).all()
+    return ModelAnswersPublic(data=model_answers, count=count)
+
+
+@router.get("/model-answers/{model_answer_id}", response_model=ModelAnswerPublic)
+def read_model_answer(session: SessionDep, model_answer_id: uuid.UUID):
+    """
+    Get a stored model answer by ID.
+    """
+    model_answer = crud.get_model_answer(
+        session=session, model_answer_id=model_answer_id
+    )
+    if not model_answer:
+        raise HTTPException(status_code=404, detail="Model answer not found")
+    return model_answer
+
 
 @router.post("/evaluate/text")
 async def evaluate_text_endpoint(
+    session: SessionDep,
+    student_answer: str = Form(...),
+    model_answer: str | None = Form(None),
+    model_answer_id: uuid.UUID | None = Form(None),
+    min_similarity: float | None = Form(None, ge=0, le=1),
+    profile: CascadeProfile | None = Form(None),
+):
+    """
+    Evaluate similarity between student answer and model answer, given as
+    text or as the ID of a stored model answer. With `min_similarity`,
+    scoring stops early once that similarity can no longer be reached and
+    `exact` tells whether the ratio is exact or a bound.
+    With a cascade `profile` ("fast", "full"), cheap metrics run first and
+    the response lists which metrics ran and how long each took; a `cached`
+    cascade result ran no metrics for this request.
+    """
+    if profile is not None and min_similarity is not None:
+        raise HTTPException(
+            status_code=422,
+            detail="min_similarity and profile cannot be combined",
+        )
+
+    model_answer, char_counts = await run_in_threadpool(
+        resolve_model_answer, session, model_answer, model_answer_id
+    )
+    key = content_key(
+        METRIC_VERSION,
+        student_answer,
+        model_answer,
+        f"min={min_similarity}",
+        f"profile={profile}",
+    )
+    result = await run_in_threadpool(evaluation_cache.get, key)
+    if profile is not None:
+        if result is not None:
+            return {
+                "status": "ok",
+                "data": {**result, "metrics_run": [], "cached": True},
+            }
+        result = await run_in_pool(
+            evaluate_text_cascade, student_answer, model_answer, profile
+        )
+        # Timings belong to this request only; the scores are cached.
+        metrics_run = result.pop("metrics_run")
+        await run_in_threadpool(evaluation_cache.put, key, result)
+        return {
+            "status": "ok",
+            "data": {**result, "metrics_run": metrics_run, "cached": False},
+        }
+    if result is None:
+        if char_counts is not None:
+            # Stored model answer: only the student side is processed.
+            results = await run_in_pool(
+                evaluate_text_batch,
+                [student_answer],
+                model_answer,
+                min_similarity,
+                char_counts,
+            )
+            result = results[0]
+        elif min_similarity is not None:
+            result = await run_in_pool(
+                evaluate_text_bounded, student_answer, model_answer, min_similarity
+            )
+        else:
+            result = await run_in_pool(evaluate_text, student_answer, model_answer)
+        await run_in_threadpool(evaluation_cache.put, key, result)
+    return {"status": "ok", "data": result}
+
+
+@router.post("/evaluate/text/batch")
+async def evaluate_text_batch_endpoint(session: SessionDep, payload: TextBatchEvaluate):
+    """
+    Evaluate many student answers against one model answer, given as text or
+    as the ID of a stored model answer.
+    Results are returned in the same order as `student_answers`. Results
+    against a stored model answer are recorded as evaluations, labelled with
+    `student_ids` when given, for `GET /evaluations/export`.
+    """
+    student_ids = payload.student_ids or [None] * len(payload.student_answers)
+    if len(student_ids) != len(payload.student_answers):
+        raise HTTPException(
+            status_code=422,
+            detail="student_ids must have one entry per student answer",
+        )
+    model_answer, char_counts = await run_in_threadpool(
+        resolve_model_answer, session, payload.model_answer, payload.model_answer_id
+    )
+    student_answers = payload.student_answers
+    mode = f"min={payload.min_similarity}"
+    keys = [
+        content_key(METRIC_VERSION, answer, model_answer, mode)
+        for answer in student_answers
+    ]
+    results = await run_in_threadpool(evaluation_cache.get_many, keys)
+
+    missing = [idx for idx, result in enumerate(results) if result is None]
+    if missing:
+        computed = await run_in_pool(
+            evaluate_text_batch,
+            [student_answers[idx] for idx in missing],
+            model_answer,
+            payload.min_similarity,
+            char_counts,
+        )
+        for idx, result in zip(missing, computed, strict=True):
+            results[idx] = result
+        await run_in_threadpool(
+            evaluation_cache.put_many,
+            [(keys[idx], results[idx]) for idx in missing],
+        )
+    if payload.model_answer_id is not None:
+        await run_in_threadpool(
+            crud.create_evaluations,
+            session=session,
+            model_answer_id=payload.model_answer_id,
+            student_ids=student_ids,
+            results=results,
+        )
+    return {"status": "ok", "data": results}
+
+
+def _evaluation_rows(model_answer_id: uuid.UUID | None):
+    # Own session: the response body is produced after the request
+    # dependencies are gone.
+    with Session(engine) as session:
+        yield from crud.iter_evaluation_rows(
+            session=session, model_answer_id=model_answer_id
+        )
+
+
+@router.get("/evaluations/export")
+def export_evaluations(
+    format: Literal["csv", "xlsx"] = "csv",
+    model_answer_id: uuid.UUID | None = None,
+):
+    """
+    Download recorded evaluations, optionally of one model answer, as CSV or
+    XLSX. Rows are streamed from the database while the file is written, so
+    memory stays flat however many rows are exported.
+    """
+    header = crud.EVALUATION_EXPORT_COLUMNS
+    rows = _evaluation_rows(model_answer_id)
+    if format == "xlsx":
+        body = iter_xlsx(header, rows, sheet_name="Evaluations")
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        body = iter_csv(header, rows)
+        media_type = "text/csv; charset=utf-8"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="evaluations.{format}"'},
+    )
+
+
+@router.post("/evaluate/text/segments")
+async def evaluate_text_segments_endpoint(
     student_answer: str = Form(...),
     model_answer: str = Form(...),
+    granularity: Literal["paragraph", "sentence"] = Form("sentence"),
 ):
     """
-    Evaluate similarity between student answer and model answer.
+    Align the answers paragraph by paragraph or sentence by sentence and
+    return a score for each aligned segment plus an aggregate.
     """
-    result = evaluate_text(student_answer, model_answer)
+    result = await run_in_pool(
+        evaluate_text_segments, student_answer, model_answer, granularity
+    )
     return {"status": "ok", "data": result}
 
 
+@router.post("/plagiarism/clusters")
+async def plagiarism_clusters_endpoint(payload: PlagiarismCheck):
+    """
+    Find clusters of suspiciously similar submissions for one assignment.
+    Candidate pairs come from MinHash/LSH buckets, so the cohort is never
+    compared all-pairs.
+    """
+    submissions = [
+        (submission.submission_id, submission.text)
+        for submission in payload.submissions
+    ]
+    result = await run_in_pool(find_suspicious_clusters, submissions, payload.threshold)
+    return {
+        "status": "ok",
+        "assignment_id": payload.assignment_id,
+        "data": result,
+    }
+
+
+@router.post("/plagiarism/fingerprints")
+async def plagiarism_fingerprints_endpoint(payload: FingerprintCheck):
+    """
+    Find earlier submissions (from any term) sharing at least `min_shared`
+    winnowing fingerprints with this text, then add it to the index.
+    """
+    matches = await run_in_threadpool(
+        fingerprint_index.lookup,
+        payload.text,
+        payload.min_shared,
+        payload.document_id,
+    )
+    if payload.index:
+        await run_in_threadpool(
+            fingerprint_index.add, [(payload.document_id, payload.text)]
+        )
+    return {"status": "ok", "document_id": payload.document_id, "matches": matches}
+
+
+@router.get("/plagiarism/fingerprints/stats")
+async def plagiarism_fingerprints_stats():
+    """
+    Size of the fingerprint index.
+    """
+    stats = await run_in_threadpool(fingerprint_index.stats)
+    return {"status": "ok", "data": stats}
+
+
 @router.post("/evaluate/audio")
-async def evaluate_audio_endpoint(file: UploadFile = File(...)):
+async def evaluate_audio_endpoint(
+    file: UploadFile = File(...),
+    trim_silence: bool = Form(True),
+    tier: str | None = Form(None),
+):
     """
     Transcribe audio using Whisper and return text.
+    With `trim_silence`, silent stretches are cut before decoding. Long
+    recordings are transcribed in parallel chunks and also return
+    timestamped segments. `tier` selects the model size; the metadata shows
+    the model and inference profile that produced the transcript.
+    """
+    model_name = whisper_model_for_tier(tier)
+    async with spool_upload(file, in_memory=True) as upload:
+        result = await transcribe_upload(upload, trim_silence, model_name)
+
+    return {
+        "status": "ok",
+        "transcript": result["text"],
+        "trimmed_seconds": result["trimmed_seconds"],
+        "segments": result.get("segments"),
+        "metadata": {"tier": tier, "profile": result.get("profile")},
+    }
+
+
+@router.post("/evaluate/audio/assessment")
+async def assess_audio_endpoint(
+    session: SessionDep,
+    file: UploadFile = File(...),
+    model_answer: str | None = Form(None),
+    model_answer_id: uuid.UUID | None = Form(None),
+    trim_silence: bool = Form(True),
+    tier: str | None = Form(None),
+):
+    """
+    Transcribe an oral answer and score it against a model answer, given as
+    text or as the ID of a stored model answer, in one call. For long
+    recordings each transcript segment is matched to its closest model
+    answer sentence while later chunks are still being transcribed.
+    """
+    model_answer, char_counts = await run_in_threadpool(
+        resolve_model_answer, session, model_answer, model_answer_id
+    )
+    model_name = whisper_model_for_tier(tier)
+    scoring: list[tuple[list[dict], asyncio.Task]] = []
+
+    def score_chunk(segments: list[dict]) -> None:
+        texts = [segment["text"] for segment in segments]
+        task = asyncio.create_task(run_in_pool(match_segments, texts, model_answer))
+        scoring.append((segments, task))
+
+    try:
+        async with spool_upload(file, in_memory=True) as upload:
+            result = await transcribe_upload(
+                upload, trim_silence, model_name, on_chunk=score_chunk
+            )
+        chunk_matches = await asyncio.gather(*(task for _, task in scoring))
+    finally:
+        # Scoring started for finished chunks must not outlive a failed
+        # transcription.
+        for _, task in scoring:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in scoring), return_exceptions=True)
+
+    segments = result.get("segments")
+    if segments is not None:
+        # The stitched transcript holds the very segment dicts handed to
+        # `score_chunk`, so each match is placed by the segment's index.
+        positions = {id(segment): index for index, segment in enumerate(segments)}
+        matches: dict[int, dict] = {}
+        for (chunk_segments, _), chunk_match in zip(
+            scoring, chunk_matches, strict=True
+        ):
+            for segment, match in zip(chunk_segments, chunk_match, strict=True):
+                index = positions.get(id(segment))
+                if index is not None:
+                    matches[index] = match
+        # Served from the cache or another request's transcription: nothing
+        # was scored along the way.
+        unscored = [index for index in range(len(segments)) if index not in matches]
+        if unscored:
+            texts = [segments[index]["text"] for index in unscored]
+            for index, match in zip(
+                unscored,
+                await run_in_pool(match_segments, texts, model_answer),
+                strict=True,
+            ):
+                matches[index] = match
+        segments = [
+            {**segment, **matches[index]} for index, segment in enumerate(segments)
+        ]
+
+    transcript = normalize_answer(result["text"])
+    scores = await run_in_pool(
+        evaluate_text_batch, [transcript], model_answer, None, char_counts
+    )
+    return {
+        "status": "ok",
+        "transcript": result["text"],
+        "trimmed_seconds": result["trimmed_seconds"],
+        "scores": scores[0],
+        "segments": segments,
+        "metadata": {"tier": tier, "profile": result.get("profile")},
+    }
+
+
+@router.websocket("/transcribe/stream")
+async def transcribe_stream(websocket: WebSocket, tier: str | None = None):
+    """
+    Live transcription. The client sends 16 kHz mono 16-bit little-endian
+    PCM as binary messages and the text message "end" when done; the server
+    pushes `partial` segments that may still change, `final` segments that
+    will not, and `done` before closing.
     """
-    # Save uploaded file temporarily
-    suffix = os.path.splitext(file.filename)[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
+    try:
+        model_name = whisper_model_for_tier(tier)
+    except HTTPException as exc:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail
+        )
+    window = RollingWindow(
+        window_seconds=settings.BTEC_STREAM_WINDOW_SECONDS,
+        step_seconds=settings.BTEC_STREAM_STEP_SECONDS,
+        commit_seconds=settings.BTEC_STREAM_COMMIT_SECONDS,
+    )
+    # One message may hold at most a window of audio, which bounds the
+    # buffer to two windows per connection.
+    max_message_bytes = window.window * 2
 
-    # Transcribe
-    text = transcribe_audio(tmp_path)
+    async def decode(final: bool) -> None:
+        segments = []
+        if window.audio.size:
+            result = await transcription_pool.run(
+                transcribe_chunk, window.audio, window.offset_seconds, model_name
+            )
+            segments = result["segments"]
+        committed, partial = window.advance(segments, final)
+        if committed:
+            await websocket.send_json({"type": "final", "segments": committed})
+        if partial:
+            await websocket.send_json({"type": "partial", "segments": partial})
 
-    # Cleanup
-    os.remove(tmp_path)
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if data is not None:
+                if len(data) > max_message_bytes:
+                    await websocket.close(code=status.WS_1009_MESSAGE_TOO_BIG)
+                    return
+                if len(data) % 2:
+                    # Not whole 16-bit samples.
+                    await websocket.close(
+                        code=status.WS_1007_INVALID_FRAME_PAYLOAD_DATA
+                    )
+                    return
+                if window.feed(pcm16_to_float(data)):
+                    await decode(final=False)
+            elif message.get("text") == "end":
+                await decode(final=True)
+                await websocket.send_json({"type": "done"})
+                await websocket.close()
+                return
+    except PoolSaturatedError:
+        await websocket.send_json(
+            {"type": "error", "detail": "Transcription queue is full, retry later"}
+        )
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    except WebSocketDisconnect:
+        return
 
-    return {"status": "ok", "transcript": text}
+
+@router.post(
+    "/jobs/transcription", response_model=TranscriptionJobPublic, status_code=202
+)
+async def submit_transcription_job(session: SessionDep, file: UploadFile = File(...)):
+    """
+    Queue audio for transcription and return the job right away.
+    Poll `GET /jobs/transcription/{job_id}` for its status and transcript.
+    """
+    async with spool_upload(
+        file, directory=settings.BTEC_TRANSCRIPTION_JOB_DIR
+    ) as upload:
+        job = await run_in_threadpool(
+            crud.create_transcription_job,
+            session=session,
+            audio_path=str(upload.path),
+            model_name=settings.BTEC_WHISPER_MODEL,
+            filename=file.filename,
+        )
+        # The job owns the file from here; the worker removes it when done.
+        upload.keep = True
+    transcription_jobs.notify()
+    return job
+
+
+@router.get("/jobs/transcription/{job_id}", response_model=TranscriptionJobPublic)
+def read_transcription_job(session: SessionDep, job_id: uuid.UUID):
+    """
+    Status of a transcription job, with the transcript once it is done.
+    """
+    job = session.get(TranscriptionJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+    return job
+
+
+def _report_batch_public(request: Request, batch: ReportBatch) -> ReportBatchPublic:
+    public = ReportBatchPublic.model_validate(batch, from_attributes=True)
+    if batch.status != "done":
+        return public
+    if batch.archive_path:
+        public.archive_url = str(
+            request.url_for("download_report_archive", batch_id=batch.id)
+        )
+    public.files = [
+        ReportFile(
+            student_id=student_id,
+            url=str(
+                request.url_for(
+                    "download_report_file", batch_id=batch.id, student_id=stem
+                )
+            ),
+        )
+        for student_id, stem in _report_batch_files(batch)
+    ]
+    if public.files:
+        public.booklet_url = str(
+            request.url_for("download_report_booklet", batch_id=batch.id)
+        )
+    return public
+
+
+def _report_batch_files(batch: ReportBatch) -> list[tuple[str, str]]:
+    """
+    (student id as sent, file stem) of every PDF a batch produced, in request
+    order. Batches from before student ids were recorded go by file stem.
+    """
+    output_dir = Path(batch.output_dir)
+    if not batch.student_ids:
+        return [(path.stem, path.stem) for path in sorted(output_dir.glob("*.pdf"))]
+    files = []
+    for student_id in batch.student_ids:
+        filename = report_filename(student_id)
+        if (output_dir / filename).is_file():
+            files.append((student_id, filename[: -len(".pdf")]))
+    return files
+
+
+def _get_report_batch(session: SessionDep, batch_id: uuid.UUID) -> ReportBatch:
+    batch = session.get(ReportBatch, batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Report batch not found")
+    return batch
+
+
+@router.post("/reports")
+async def create_report(report: StudentReport, force: bool = False):
+    """
+    Render one student's PDF report, or return the stored PDF when its
+    content is unchanged since it was last rendered.
+    """
+    if (report.html is None) == (report.context is None):
+        raise HTTPException(
+            status_code=422, detail="Provide exactly one of html or context"
+        )
+    try:
+        path, reused = await report_batches.render_stored(
+            report.student_id,
+            report.context if report.html is None else report.html,
+            force=force,
+        )
+    except PoolSaturatedError:
+        raise HTTPException(status_code=503, detail="Report queue is full, retry later")
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=report_filename(report.student_id),
+        headers={"X-Report-Reused": "true" if reused else "false"},
+    )
+
+
+@router.post("/reports/batch", response_model=ReportBatchPublic, status_code=202)
+async def create_report_batch(
+    request: Request, session: SessionDep, batch_in: ReportBatchCreate
+):
+    """
+    Render a PDF report per student in the report pool and return the batch
+    right away. Poll `GET /reports/batch/{batch_id}` for progress; once it is
+    done the response links to every PDF and, if requested, a zip archive.
+    Reports given as a context are rendered with the student report template.
+    Students whose content is unchanged since their last report reuse the
+    stored PDF unless `force` is set, so regenerating a class only renders
+    the students whose data changed.
+    """
+    filenames = {report_filename(report.student_id) for report in batch_in.reports}
+    if len(filenames) != len(batch_in.reports):
+        raise HTTPException(status_code=422, detail="Student ids must be unique")
+    if any((r.html is None) == (r.context is None) for r in batch_in.reports):
+        raise HTTPException(
+            status_code=422,
+            detail="Provide exactly one of html or context for each report",
+        )
+
+    batch = await run_in_threadpool(
+        crud.create_report_batch,
+        session=session,
+        student_ids=[report.student_id for report in batch_in.reports],
+        output_root=settings.BTEC_REPORT_OUTPUT_DIR,
+    )
+    report_batches.submit(
+        batch.id,
+        batch.output_dir,
+        [
+            (r.student_id, r.context if r.html is None else r.html)
+            for r in batch_in.reports
+        ],
+        batch_in.archive,
+        force=batch_in.force,
+    )
+    return _report_batch_public(request, batch)
+
+
+@router.get("/reports/batch/{batch_id}", response_model=ReportBatchPublic)
+def read_report_batch(request: Request, session: SessionDep, batch_id: uuid.UUID):
+    """
+    Progress of a report batch, with download links once it is done. A batch
+    whose worker stopped reporting progress is marked failed.
+    """
+    crud.fail_stale_report_batches(
+        session=session,
+        lease_seconds=settings.BTEC_REPORT_BATCH_LEASE_SECONDS,
+        batch_id=batch_id,
+    )
+    return _report_batch_public(request, _get_report_batch(session, batch_id))
+
+
+@router.get("/reports/batch/{batch_id}/archive")
+def download_report_archive(session: SessionDep, batch_id: uuid.UUID):
+    """
+    Zip archive of every PDF in a finished report batch.
+    """
+    batch = _get_report_batch(session, batch_id)
+    if not batch.archive_path:
+        raise HTTPException(status_code=404, detail="Report archive not found")
+    return FileResponse(
+        batch.archive_path, media_type="application/zip", filename=ARCHIVE_NAME
+    )
+
+
+@router.get("/reports/batch/{batch_id}/booklet")
+async def download_report_booklet(session: SessionDep, batch_id: uuid.UUID):
+    """
+    One PDF of every report in a finished batch, with a table of contents and
+    a bookmark per student. The first download builds it in the report pool
+    and streams it while it is written; later downloads get the stored file.
+    """
+    batch = await run_in_threadpool(_get_report_batch, session, batch_id)
+    if batch.status != "done":
+        raise HTTPException(status_code=409, detail="Report batch is not finished")
+    path = Path(booklet_path(batch.output_dir))
+    if path.is_file():
+        return FileResponse(path, media_type="application/pdf", filename=path.name)
+    entries = [
+        (student_id, str(Path(batch.output_dir) / f"{stem}.pdf"))
+        for student_id, stem in _report_batch_files(batch)
+    ]
+    if not entries:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = f"{path}.{uuid.uuid4().hex}.part"
+    # Exists before the worker opens it, so the response can follow it.
+    Path(partial).touch()
+    writer = asyncio.ensure_future(
+        report_pool.run(build_booklet, entries, partial, str(path))
+    )
+    # One loop pass lets the pool accept or reject the job.
+    await asyncio.sleep(0)
+    if writer.done() and isinstance(writer.exception(), PoolSaturatedError):
+        Path(partial).unlink(missing_ok=True)
+        raise HTTPException(status_code=503, detail="Report queue is full, retry later")
+    writer.add_done_callback(log_booklet_failure)
+    return StreamingResponse(
+        follow_file(partial, writer),
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="booklet.pdf"'},
+    )
+
+
+@router.get("/reports/batch/{batch_id}/files/{student_id}")
+def download_report_file(session: SessionDep, batch_id: uuid.UUID, student_id: str):
+    """
+    One student's PDF from a report batch.
+    """
+    batch = _get_report_batch(session, batch_id)
+    path = Path(batch.output_dir) / report_filename(student_id)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Report not found")
+    return FileResponse(path, media_type="application/pdf", filename=path.name)
+
+
+@router.get("/pool/stats")
+async def pool_stats():
+    """
+    Queue depth and wait times of the evaluation, transcription and report
+    pools.
+    """
+    return {
+        "status": "ok",
+        "data": {
+            "evaluation": evaluation_pool.stats(),
+            "transcription": transcription_pool.stats(),
+            "transcription_batching": transcription_batcher.stats(),
+            "reports": report_pool.stats(),
+        },
+    }
+
+
+@router.get("/audio/models")
+async def audio_models():
+    """
+    Whisper models loaded by a transcription worker, with load time and
+    resident memory.
+    """
+    stats = await run_in_pool(model_stats, pool=transcription_pool)
+    return {"status": "ok", "data": stats}
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit and miss counters of the text evaluation and transcript caches.
+    """
+    return {
+        "status": "ok",
+        "data": {
+            "evaluation": evaluation_cache.stats(),
+            "transcripts": {
+                **transcript_cache.stats(),
+                "single_flight": transcription_flights.stats(),
+            },
+        },
+    }
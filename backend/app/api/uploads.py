@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.btec_engine.audio_evaluator import (
+    SAMPLE_RATE,
+    AudioSource,
+    decode_audio_bytes,
+)
+from app.core.config import settings
+
+_DURATION_RE = re.compile(rb"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+# Multipart boundaries, part headers and the other form fields.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+@dataclass
+class SpooledUpload:
+    path: Path
+    size: int
+    # SHA-256 of the uploaded bytes, computed while streaming.
+    sha256: str = ""
+    # Seconds, when ffmpeg could determine it.
+    duration: float | None = None
+    # Set by the caller when the file must outlive the request.
+    keep: bool = False
+    # 16 kHz int16 samples when the upload was decoded in memory; `path` is
+    # then never written.
+    audio: np.ndarray | None = None
+
+    @property
+    def source(self) -> AudioSource:
+        return self.audio if self.audio is not None else str(self.path)
+
+
+async def probe_duration(path: Path) -> float | None:
+    """
+    Container duration in seconds as reported by ffmpeg, or None when it
+    cannot be determined (e.g. a stream without a duration header).
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-nostdin",
+            "-hide_banner",
+            "-i",
+            str(path),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        return None
+    _, stderr = await process.communicate()
+    match = _DURATION_RE.search(stderr)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+@asynccontextmanager
+async def spool_upload(
+    file: UploadFile,
+    *,
+    directory: str | None = None,
+    max_bytes: int | None = None,
+    max_seconds: float | None = None,
+    in_memory: bool = False,
+) -> AsyncIterator[SpooledUpload]:
+    """
+    Copy an upload to the spool directory in fixed-size chunks, enforcing the
+    size and duration limits before any transcription work starts. The file
+    is removed on exit, including on errors, unless `keep` was set.
+
+    By the time this runs Starlette has already received the whole body, so
+    the size check here is on the file alone; oversized request bodies are
+    cut off while they arrive by `UploadSizeLimitMiddleware`.
+
+    With `in_memory`, uploads up to BTEC_AUDIO_IN_MEMORY_MAX_BYTES are piped
+    through ffmpeg into `audio` without touching the disk. ffmpeg stops after
+    BTEC_AUDIO_IN_MEMORY_MAX_SECONDS, so the decoded samples stay small
+    however long the recording is. Larger uploads, recordings that reach
+    that length and formats ffmpeg cannot read from a pipe fall back to the
+    spooled file.
+    """
+    max_bytes = settings.BTEC_AUDIO_MAX_BYTES if max_bytes is None else max_bytes
+    if max_seconds is None:
+        max_seconds = settings.BTEC_AUDIO_MAX_SECONDS
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail="Audio file is too large")
+
+    spool_dir = Path(
+        directory or settings.BTEC_AUDIO_SPOOL_DIR or tempfile.gettempdir()
+    )
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    suffix = os.path.splitext(file.filename or "")[1]
+    upload = SpooledUpload(path=spool_dir / f"{uuid.uuid4()}{suffix}", size=0)
+    digest = hashlib.sha256()
+    buffer = bytearray() if in_memory else None
+    out = None
+    try:
+        while chunk := await file.read(settings.BTEC_UPLOAD_CHUNK_BYTES):
+            upload.size += len(chunk)
+            if upload.size > max_bytes:
+                raise HTTPException(status_code=413, detail="Audio file is too large")
+            digest.update(chunk)
+            if (
+                buffer is not None
+                and upload.size <= settings.BTEC_AUDIO_IN_MEMORY_MAX_BYTES
+            ):
+                buffer += chunk
+                continue
+            if out is None:
+                out = open(upload.path, "wb")
+                if buffer:
+                    await run_in_threadpool(out.write, buffer)
+                buffer = None
+            await run_in_threadpool(out.write, chunk)
+        upload.sha256 = digest.hexdigest()
+
+        if buffer is not None:
+            limit = min(max_seconds, settings.BTEC_AUDIO_IN_MEMORY_MAX_SECONDS)
+            try:
+                audio = await run_in_threadpool(
+                    decode_audio_bytes, bytes(buffer), max_seconds=limit
+                )
+            except RuntimeError:
+                audio = None
+            # Cut off at the limit: the recording goes on and is spooled.
+            if audio is not None and len(audio) < limit * SAMPLE_RATE:
+                upload.audio = audio
+                upload.duration = len(audio) / SAMPLE_RATE
+            else:
+                out = open(upload.path, "wb")
+                await run_in_threadpool(out.write, buffer)
+        if out is not None:
+            out.close()
+        elif upload.audio is None:
+            upload.path.touch()
+
+        if upload.audio is None:
+            upload.duration = await probe_duration(upload.path)
+        duration = upload.duration
+        if duration is not None and duration > max_seconds:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Audio is longer than {max_seconds:g} seconds",
+            )
+        yield upload
+    finally:
+        if out is not None:
+            out.close()
+        if not upload.keep:
+            upload.path.unlink(missing_ok=True)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects multipart request bodies larger than `max_bytes` (by default
+    BTEC_AUDIO_MAX_BYTES plus the multipart overhead) with 413 while they
+    are received, before Starlette's form parser has written the upload to
+    its temporary file. A declared Content-Length is refused up front;
+    chunked bodies are counted as they arrive.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int | None = None) -> None:
+        self.app = app
+        if max_bytes is None:
+            max_bytes = settings.BTEC_AUDIO_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(
+                {"detail": "Request body is too large"}, status_code=413
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the form parser; FastAPI turns it into
+                    # the response.
+                    raise HTTPException(
+                        status_code=413, detail="Request body is too large"
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
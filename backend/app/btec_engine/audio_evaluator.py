@@ -1,7 +1,515 @@
-import whisper
+import subprocess
+from itertools import pairwise
 
-model = whisper.load_model("base")
+import numpy as np
 
-def transcribe_audio(file_path: str) -> str:
-    result = model.transcribe(file_path, language="en")
-    return result.get("text", "")
\ No newline at end of file
+from app.btec_engine.whisper_models import model_manager
+
+DEFAULT_MODEL = "base"
+LANGUAGE = "en"
+SAMPLE_RATE = 16_000
+# A path for ffmpeg to decode, or samples already decoded in memory: float32
+# in [-1, 1], or the int16 PCM piped decodes produce.
+AudioSource = str | np.ndarray
+# Frames quieter than this are silence even in a recording with no speech.
+_SILENCE_FLOOR_DB = -60.0
+# Whisper's input window; only clips that fit it can be decoded in a batch.
+BATCH_WINDOW_SECONDS = 30.0
+# transcribe()'s defaults for retrying a decode at a higher temperature and
+# for dropping a window as silence.
+_COMPRESSION_RATIO_THRESHOLD = 2.4
+_LOGPROB_THRESHOLD = -1.0
+_NO_SPEECH_THRESHOLD = 0.6
+
+
+def _frame_energy(frames: np.ndarray) -> np.ndarray:
+    # Energy in dB of each row of int16 or float samples.
+    samples = frames.astype(np.float64)
+    if frames.dtype == np.int16:
+        samples /= 32768.0
+    return 10 * np.log10(np.mean(samples**2, axis=1) + 1e-10)
+
+
+def _regions_from_energy(
+    energy: np.ndarray,
+    frame: int,
+    total_samples: int,
+    sample_rate: int,
+    threshold_db: float,
+    min_silence_ms: int,
+    padding_ms: int,
+) -> list[tuple[int, int]]:
+    if energy.size == 0:
+        return [(0, total_samples)] if total_samples else []
+
+    voiced = energy > max(energy.max() + threshold_db, _SILENCE_FLOOR_DB)
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame
+    ends = np.flatnonzero(edges == -1) * frame
+    if ends.size and ends[-1] == energy.size * frame:
+        # The partial frame at the end belongs to a region that reaches it.
+        ends[-1] = total_samples
+
+    padding = sample_rate * padding_ms // 1000
+    min_gap = sample_rate * min_silence_ms // 1000
+    regions: list[tuple[int, int]] = []
+    for start, end in zip(starts, ends, strict=True):
+        start = max(0, int(start) - padding)
+        end = min(total_samples, int(end) + padding)
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def speech_regions(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+    threshold_db: float = -35.0,
+    min_silence_ms: int = 500,
+    padding_ms: int = 150,
+) -> list[tuple[int, int]]:
+    """
+    Sample ranges that contain speech, found by frame energy.
+
+    A frame is voiced when its energy is within `threshold_db` of the loudest
+    frame. Pauses shorter than `min_silence_ms` are kept inside a region and
+    every region is padded by `padding_ms` so word edges are not clipped.
+    """
+    frame = sample_rate * frame_ms // 1000
+    frame_count = len(audio) // frame
+    energy = _frame_energy(audio[: frame_count * frame].reshape(frame_count, frame))
+    return _regions_from_energy(
+        energy,
+        frame,
+        len(audio),
+        sample_rate,
+        threshold_db,
+        min_silence_ms,
+        padding_ms,
+    )
+
+
+def stream_speech_regions(
+    file_path: str,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+    threshold_db: float = -35.0,
+    min_silence_ms: int = 500,
+    padding_ms: int = 150,
+) -> tuple[list[tuple[int, int]], int]:
+    """
+    Like `speech_regions` for a file, with the number of samples it decodes
+    to. ffmpeg's output is read a block at a time and only the frame
+    energies are kept, so memory does not grow with the recording.
+    """
+    frame = sample_rate * frame_ms // 1000
+    block_bytes = frame * 2 * 1000
+    command = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-threads",
+        "0",
+        "-i",
+        file_path,
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(sample_rate),
+        "-",
+    ]
+    energies = []
+    total_samples = 0
+    pending = b""
+    with subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    ) as process:
+        assert process.stdout is not None and process.stderr is not None
+        while data := process.stdout.read(block_bytes):
+            total_samples += len(data) // 2
+            pending += data
+            usable = len(pending) // (frame * 2) * frame * 2
+            if usable:
+                frames = np.frombuffer(pending[:usable], np.int16).reshape(-1, frame)
+                energies.append(_frame_energy(frames))
+                pending = pending[usable:]
+        stderr = process.stderr.read()
+    if process.returncode:
+        raise RuntimeError(f"Failed to load audio: {stderr.decode()}")
+
+    energy = np.concatenate(energies) if energies else np.empty(0)
+    regions = _regions_from_energy(
+        energy,
+        frame,
+        total_samples,
+        sample_rate,
+        threshold_db,
+        min_silence_ms,
+        padding_ms,
+    )
+    return regions, total_samples
+
+
+def trim_silence(
+    audio: np.ndarray, sample_rate: int = SAMPLE_RATE
+) -> tuple[np.ndarray, float]:
+    """
+    Audio with the silence between speech regions cut out, and the number of
+    seconds removed.
+    """
+    regions = speech_regions(audio, sample_rate)
+    if not regions:
+        return audio[:0], len(audio) / sample_rate
+    trimmed = np.concatenate([audio[start:end] for start, end in regions])
+    return trimmed, (len(audio) - len(trimmed)) / sample_rate
+
+
+def _pack_chunks(
+    regions: list[tuple[int, int]],
+    total_samples: int,
+    max_chunk_seconds: float,
+    trim: bool,
+    sample_rate: int,
+) -> list[tuple[int, int]]:
+    max_length = int(max_chunk_seconds * sample_rate)
+    pieces = []
+    for start, end in regions:
+        while end - start > max_length:
+            pieces.append((start, start + max_length))
+            start += max_length
+        pieces.append((start, end))
+
+    chunks: list[tuple[int, int]] = []
+    for start, end in pieces:
+        if chunks and end - chunks[-1][0] <= max_length:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+    if trim or not chunks:
+        return chunks
+
+    bounds = [0]
+    for (_, previous_end), (next_start, _) in pairwise(chunks):
+        bounds.append((previous_end + next_start) // 2)
+    bounds.append(total_samples)
+    return list(pairwise(bounds))
+
+
+def plan_chunks(
+    audio: np.ndarray,
+    max_chunk_seconds: float = 30.0,
+    trim: bool = False,
+    sample_rate: int = SAMPLE_RATE,
+) -> list[tuple[int, int]]:
+    """
+    Split a recording into sample ranges of about `max_chunk_seconds` that
+    start and end in silence, so they can be transcribed independently.
+
+    Speech regions are packed greedily into chunks; a region longer than a
+    chunk is cut at fixed intervals. With `trim` the silence outside the
+    chunks is dropped, otherwise chunk boundaries fall in the middle of the
+    pauses between them and together they cover the whole recording.
+    """
+    return _pack_chunks(
+        speech_regions(audio, sample_rate),
+        len(audio),
+        max_chunk_seconds,
+        trim,
+        sample_rate,
+    )
+
+
+def plan_file_chunks(
+    file_path: str,
+    max_chunk_seconds: float = 30.0,
+    trim: bool = False,
+    sample_rate: int = SAMPLE_RATE,
+) -> tuple[list[tuple[int, int]], int]:
+    """
+    `plan_chunks` for a file without holding its samples, with the number of
+    samples the file decodes to.
+    """
+    regions, total_samples = stream_speech_regions(file_path, sample_rate)
+    chunks = _pack_chunks(regions, total_samples, max_chunk_seconds, trim, sample_rate)
+    return chunks, total_samples
+
+
+def decode_audio(
+    file_path: str,
+    sample_rate: int = SAMPLE_RATE,
+    start_seconds: float = 0.0,
+    duration_seconds: float | None = None,
+) -> np.ndarray:
+    """
+    Decode any ffmpeg-readable file to mono float32 samples in [-1, 1], the
+    same format `whisper.load_audio` produces, without importing torch.
+    `start_seconds` and `duration_seconds` decode only that part of it.
+    """
+    input_args = ["-nostdin"]
+    if start_seconds:
+        input_args += ["-ss", f"{start_seconds:.6f}"]
+    if duration_seconds is not None:
+        input_args += ["-t", f"{duration_seconds:.6f}"]
+    return _ffmpeg_decode([*input_args, "-i", file_path], None, sample_rate)
+
+
+def decode_audio_bytes(
+    data: bytes, sample_rate: int = SAMPLE_RATE, max_seconds: float | None = None
+) -> np.ndarray:
+    """
+    Decode encoded bytes piped through ffmpeg's stdin to mono int16 samples,
+    half the size of `decode_audio`'s; `load_audio` converts them where they
+    are transcribed. ffmpeg stops after `max_seconds` of audio, so a long
+    recording in a small file never decodes in full. Containers that need
+    seeking (e.g. MP4 with a trailing index) cannot be read from a pipe and
+    raise RuntimeError.
+    """
+    input_args = ["-nostdin"]
+    if max_seconds is not None:
+        input_args += ["-t", f"{max_seconds:.6f}"]
+    return _ffmpeg_pcm([*input_args, "-i", "pipe:0"], data, sample_rate)
+
+
+def pcm_to_float(samples: np.ndarray) -> np.ndarray:
+    return samples.astype(np.float32) / 32768.0
+
+
+def _ffmpeg_decode(
+    input_args: list[str], data: bytes | None, sample_rate: int
+) -> np.ndarray:
+    return pcm_to_float(_ffmpeg_pcm(input_args, data, sample_rate))
+
+
+def _ffmpeg_pcm(
+    input_args: list[str], data: bytes | None, sample_rate: int
+) -> np.ndarray:
+    command = [
+        "ffmpeg",
+        "-threads",
+        "0",
+        *input_args,
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(sample_rate),
+        "-",
+    ]
+    try:
+        output = subprocess.run(
+            command, input=data, capture_output=True, check=True
+        ).stdout
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(f"Failed to load audio: {exc.stderr.decode()}") from exc
+    return np.frombuffer(output, np.int16)
+
+
+def load_audio(source: AudioSource) -> np.ndarray:
+    if isinstance(source, np.ndarray):
+        return pcm_to_float(source) if source.dtype == np.int16 else source
+    return decode_audio(source)
+
+
+def _load_audio(source: AudioSource, trim: bool) -> tuple[np.ndarray, float]:
+    audio = load_audio(source)
+    if not trim:
+        return audio, 0.0
+    return trim_silence(audio)
+
+
+def transcribe_audio(
+    source: AudioSource, model_name: str = DEFAULT_MODEL, trim: bool = False
+) -> str:
+    model = model_manager.get(model_name)
+    audio, _ = _load_audio(source, trim)
+    if audio.size == 0:
+        return ""
+    result = model.transcribe(audio, language=LANGUAGE)
+    return result.get("text", "")
+
+
+def transcribe_clip(
+    source: AudioSource, model_name: str = DEFAULT_MODEL, trim: bool = False
+) -> dict:
+    """
+    Transcribe one recording with `transcribe`'s sliding window, returning
+    the same result as `transcribe_batch` does for each of its files.
+    """
+    model = model_manager.get(model_name)
+    audio, trimmed_seconds = _load_audio(source, trim)
+    text = ""
+    if audio.size:
+        text = model.transcribe(audio, language=LANGUAGE).get("text", "")
+    return {
+        "text": text,
+        "trimmed_seconds": trimmed_seconds,
+        "profile": model_manager.profile(model_name),
+    }
+
+
+def _needs_fallback(decoded) -> bool:
+    # The checks transcribe() makes before retrying at a higher temperature;
+    # a window that is probably silence is never retried.
+    if _is_silence(decoded):
+        return False
+    return (
+        decoded.compression_ratio > _COMPRESSION_RATIO_THRESHOLD
+        or decoded.avg_logprob < _LOGPROB_THRESHOLD
+    )
+
+
+def _is_silence(decoded) -> bool:
+    return (
+        decoded.no_speech_prob > _NO_SPEECH_THRESHOLD
+        and decoded.avg_logprob < _LOGPROB_THRESHOLD
+    )
+
+
+def transcribe_batch(
+    sources: list[AudioSource],
+    model_name: str = DEFAULT_MODEL,
+    trim: list[bool] | None = None,
+) -> list[dict | Exception]:
+    """
+    Transcribe several recordings, given as paths or decoded samples, with
+    one encoder/decoder pass.
+
+    Clips that fit in Whisper's 30 second window are padded and decoded as a
+    single greedy batch. Callers should send longer clips to
+    `transcribe_clip`; one that is only found to be longer after decoding
+    falls back to the sequential sliding-window `transcribe`. Files flagged
+    in `trim` have their silences removed first, which also lets more
+    recordings fit the batched window.
+
+    Like `transcribe`, a clip whose batched decode looks like a repetition
+    loop or has a low log probability is decoded again with `transcribe`'s
+    temperature fallback, and one that is most likely silence comes back
+    empty. Each result holds the text, the seconds trimmed and the inference
+    profile; a file that fails is returned as its exception so the rest of
+    the batch still succeeds.
+    """
+    import torch
+    import whisper
+
+    model = model_manager.get(model_name)
+    trim = trim or [False] * len(sources)
+    results: list[dict | Exception] = [{} for _ in sources]
+    batch_indexes = []
+    batch_audio = []
+    mels = []
+    for idx, source in enumerate(sources):
+        try:
+            audio, trimmed_seconds = _load_audio(source, trim[idx])
+            results[idx] = {
+                "text": "",
+                "trimmed_seconds": trimmed_seconds,
+                "profile": model_manager.profile(model_name),
+            }
+            if audio.size == 0:
+                continue
+            if len(audio) > whisper.audio.N_SAMPLES:
+                results[idx]["text"] = model.transcribe(audio, language=LANGUAGE).get(
+                    "text", ""
+                )
+                continue
+        except Exception as exc:
+            results[idx] = exc
+            continue
+        mels.append(
+            whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(audio), model.dims.n_mels, device=model.device
+            )
+        )
+        batch_indexes.append(idx)
+        batch_audio.append(audio)
+
+    if mels:
+        options = whisper.DecodingOptions(
+            language=LANGUAGE,
+            without_timestamps=True,
+            fp16=model.device.type == "cuda",
+        )
+        with torch.inference_mode():
+            decoded = whisper.decode(model, torch.stack(mels), options)
+        for idx, audio, result in zip(batch_indexes, batch_audio, decoded, strict=True):
+            try:
+                if _needs_fallback(result):
+                    results[idx]["text"] = model.transcribe(
+                        audio, language=LANGUAGE
+                    ).get("text", "")
+                elif not _is_silence(result):
+                    results[idx]["text"] = result.text
+            except Exception as exc:
+                results[idx] = exc
+    return results
+
+
+def transcribe_chunk(
+    audio: AudioSource,
+    offset_seconds: float,
+    model_name: str = DEFAULT_MODEL,
+    duration_seconds: float | None = None,
+) -> dict:
+    """
+    Timestamped segments of one chunk, shifted by the chunk's position in
+    the full recording, with the inference profile that produced them.
+
+    The chunk is either its samples or the path of the full recording, of
+    which the `duration_seconds` from `offset_seconds` are decoded here.
+    """
+    model = model_manager.get(model_name)
+    if isinstance(audio, np.ndarray):
+        audio = load_audio(audio)
+    else:
+        audio = decode_audio(
+            audio, start_seconds=offset_seconds, duration_seconds=duration_seconds
+        )
+    result = model.transcribe(audio, language=LANGUAGE)
+    segments = [
+        {
+            "start": offset_seconds + segment["start"],
+            "end": offset_seconds + segment["end"],
+            "text": segment["text"].strip(),
+        }
+        for segment in result.get("segments", [])
+    ]
+    return {"segments": segments, "profile": model_manager.profile(model_name)}
+
+
+def stitch_segments(chunk_segments: list[list[dict]]) -> dict:
+    segments = [segment for chunk in chunk_segments for segment in chunk]
+    segments.sort(key=lambda segment: segment["start"])
+    return {
+        "text": " ".join(segment["text"] for segment in segments if segment["text"]),
+        "segments": segments,
+    }
+
+
+def warm_up(model_names: list[str]) -> None:
+    model_manager.warm_up(model_names)
+
+
+def init_worker(
+    quantize: bool, threads: int | None, preload: list[str] | None = None
+) -> None:
+    """
+    Transcription pool initializer: applies the inference profile before
+    any model is loaded, then optionally preloads models.
+    """
+    model_manager.configure(quantize=quantize, threads=threads)
+    model_manager.warm_up(preload or [])
+
+
+def model_stats() -> dict:
+    return model_manager.stats()
@@ -0,0 +1,279 @@
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from pypdf import PdfReader
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    PdfObject,
+    StreamObject,
+    TextStringObject,
+)
+
+TOC_TEMPLATE = "booklet_toc.html"
+# The contents' page count shifts every entry; it settles within a few passes.
+TOC_MAX_PASSES = 4
+
+# Renders the table of contents, given (title, page number) entries, to a PDF
+TocRenderer = Callable[[list[tuple[str, int]], str], None]
+
+
+class BookletWriter:
+    """
+    Writes one PDF out of many, appending each input's pages to the output
+    stream as soon as it is added.
+
+    Objects are copied with renumbered references and written straight away;
+    only their byte offsets and the page numbers stay in memory, so joining
+    hundreds of reports takes about as much RAM as the largest of them. The
+    page tree, bookmarks and an optional table of contents, placed before the
+    first report, are written by `close()`.
+    """
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        # Byte offset of every object, by object number - 1.
+        self._offsets: list[int | None] = []
+        self._pages_root = self._reserve()
+        self._pages: list[int] = []
+        # (title, first page object, index of the first page)
+        self._bookmarks: list[tuple[str, int, int]] = []
+        self._write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    @property
+    def bookmarks(self) -> list[tuple[str, int]]:
+        """
+        (title, index of the first page) of every added PDF.
+        """
+        return [(title, index) for title, _, index in self._bookmarks]
+
+    def _write(self, data: bytes) -> None:
+        self._stream.write(data)
+
+    def _reserve(self) -> int:
+        self._offsets.append(None)
+        return len(self._offsets)
+
+    def _write_object(
+        self,
+        number: int,
+        obj: PdfObject,
+        refs: Callable[[IndirectObject], int],
+        page: bool = False,
+    ) -> None:
+        self._offsets[number - 1] = self._stream.tell()
+        self._write(f"{number} 0 obj\n".encode())
+        self._serialize(obj, refs, page)
+        self._write(b"\nendobj\n")
+
+    @staticmethod
+    def _own_refs(ref: IndirectObject) -> int:
+        # References between the objects the booklet itself creates.
+        return ref.idnum
+
+    def _serialize(
+        self, obj: Any, refs: Callable[[IndirectObject], int], page: bool = False
+    ) -> None:
+        if isinstance(obj, IndirectObject):
+            self._write(f"{refs(obj)} 0 R".encode())
+        elif isinstance(obj, DictionaryObject):
+            stream = obj._data if isinstance(obj, StreamObject) else None
+            self._write(b"<<")
+            for key, value in obj.items():
+                if page and key == "/Parent":
+                    self._write(f"/Parent {self._pages_root} 0 R ".encode())
+                    continue
+                if stream is not None and key == "/Length":
+                    # The source length may be an indirect object.
+                    continue
+                NameObject(key).write_to_stream(self._stream)
+                self._write(b" ")
+                self._serialize(value, refs)
+                self._write(b" ")
+            if stream is not None:
+                self._write(f"/Length {len(stream)}".encode())
+            self._write(b">>")
+            if stream is not None:
+                # Still encoded with the source's /Filter.
+                self._write(b"\nstream\n" + stream + b"\nendstream")
+        elif isinstance(obj, ArrayObject):
+            self._write(b"[")
+            for value in obj:
+                self._serialize(value, refs)
+                self._write(b" ")
+            self._write(b"]")
+        elif obj is None:
+            NullObject().write_to_stream(self._stream)
+        else:
+            obj.write_to_stream(self._stream)
+
+    def _copy_pages(self, reader: PdfReader) -> list[int]:
+        mapping: dict[tuple[int, int], int] = {}
+        pending: deque[tuple[int, Any]] = deque()
+
+        def refs(ref: IndirectObject) -> int:
+            key = (ref.idnum, ref.generation)
+            if key not in mapping:
+                mapping[key] = self._reserve()
+                pending.append((mapping[key], ref))
+            return mapping[key]
+
+        # Numbered up front so links between pages never pull in the source
+        # page tree.
+        pages = [self._reserve() for _ in reader.pages]
+        for page, number in zip(reader.pages, pages, strict=True):
+            if page.indirect_reference is not None:
+                ref = page.indirect_reference
+                mapping[(ref.idnum, ref.generation)] = number
+        for page, number in zip(reader.pages, pages, strict=True):
+            self._write_object(number, page, refs, page=True)
+            # Write what this page uses before moving on to the next one.
+            while pending:
+                ref_number, ref = pending.popleft()
+                self._write_object(ref_number, ref.get_object(), refs)
+        return pages
+
+    def add(self, title: str, path: str) -> int:
+        """
+        Append every page of the PDF at `path` under a bookmark called
+        `title` and return the number of pages added.
+        """
+        reader = PdfReader(path)
+        pages = self._copy_pages(reader)
+        if pages:
+            self._bookmarks.append((title, pages[0], len(self._pages)))
+            self._pages.extend(pages)
+        self._stream.flush()
+        return len(pages)
+
+    def close(self, toc_path: str | None = None, toc_title: str = "Contents") -> None:
+        toc_pages = self._copy_pages(PdfReader(toc_path)) if toc_path else []
+        kids = toc_pages + self._pages
+        bookmarks = [(title, page) for title, page, _ in self._bookmarks]
+        if toc_pages:
+            bookmarks.insert(0, (toc_title, toc_pages[0]))
+
+        self._write_object(
+            self._pages_root,
+            DictionaryObject(
+                {
+                    NameObject("/Type"): NameObject("/Pages"),
+                    NameObject("/Kids"): ArrayObject(self._ref(kid) for kid in kids),
+                    NameObject("/Count"): NumberObject(len(kids)),
+                }
+            ),
+            self._own_refs,
+        )
+        outline = self._write_outline(bookmarks)
+        catalog = self._reserve()
+        entries: dict[Any, Any] = {
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): self._ref(self._pages_root),
+        }
+        if outline is not None:
+            entries[NameObject("/Outlines")] = self._ref(outline)
+            entries[NameObject("/PageMode")] = NameObject("/UseOutlines")
+        self._write_object(catalog, DictionaryObject(entries), self._own_refs)
+        self._write_trailer(catalog)
+        self._stream.flush()
+
+    @staticmethod
+    def _ref(number: int) -> IndirectObject:
+        return IndirectObject(number, 0, None)
+
+    def _write_outline(self, bookmarks: list[tuple[str, int]]) -> int | None:
+        if not bookmarks:
+            return None
+        root = self._reserve()
+        items = [self._reserve() for _ in bookmarks]
+        for index, (title, page) in enumerate(bookmarks):
+            item: dict[Any, Any] = {
+                NameObject("/Title"): TextStringObject(title),
+                NameObject("/Parent"): self._ref(root),
+                NameObject("/Dest"): ArrayObject([self._ref(page), NameObject("/Fit")]),
+            }
+            if index:
+                item[NameObject("/Prev")] = self._ref(items[index - 1])
+            if index + 1 < len(items):
+                item[NameObject("/Next")] = self._ref(items[index + 1])
+            self._write_object(items[index], DictionaryObject(item), self._own_refs)
+        self._write_object(
+            root,
+            DictionaryObject(
+                {
+                    NameObject("/Type"): NameObject("/Outlines"),
+                    NameObject("/First"): self._ref(items[0]),
+                    NameObject("/Last"): self._ref(items[-1]),
+                    NameObject("/Count"): NumberObject(len(items)),
+                }
+            ),
+            self._own_refs,
+        )
+        return root
+
+    def _write_trailer(self, catalog: int) -> None:
+        xref_offset = self._stream.tell()
+        lines = [f"xref\n0 {len(self._offsets) + 1}\n", "0000000000 65535 f \n"]
+        for offset in self._offsets:
+            if offset is None:
+                raise RuntimeError("Booklet object was reserved but never written")
+            lines.append(f"{offset:010d} 00000 n \n")
+        lines.append(
+            f"trailer\n<< /Size {len(self._offsets) + 1} /Root {catalog} 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n"
+        )
+        self._write("".join(lines).encode())
+
+
+def render_toc(entries: list[tuple[str, int]], output_path: str) -> None:
+    from app.btec_engine.report_generator import generate_report_from_context
+
+    generate_report_from_context(
+        {"entries": [{"title": title, "page": page} for title, page in entries]},
+        output_path,
+        TOC_TEMPLATE,
+    )
+
+
+def write_booklet(
+    entries: list[tuple[str, str]],
+    output_path: str,
+    toc: TocRenderer | None = render_toc,
+) -> None:
+    """
+    Join the PDFs of `entries` (title, path) into one booklet at
+    `output_path`, which grows as each PDF is appended and is complete once
+    this returns.
+    """
+    with open(output_path, "wb") as stream:
+        writer = BookletWriter(stream)
+        for title, path in entries:
+            writer.add(title, path)
+        toc_path = None
+        if toc is not None and writer.bookmarks:
+            toc_path = output_path + ".toc.pdf"
+            toc_pages = 1
+            for _ in range(TOC_MAX_PASSES):
+                numbered = [
+                    (title, toc_pages + index + 1) for title, index in writer.bookmarks
+                ]
+                toc(numbered, toc_path)
+                rendered = len(PdfReader(toc_path).pages)
+                if rendered == toc_pages:
+                    break
+                toc_pages = rendered
+        try:
+            writer.close(toc_path)
+        finally:
+            if toc_path:
+                Path(toc_path).unlink(missing_ok=True)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+
+def normalize_answer(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_key(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        # Length prefix so ("ab", "c") and ("a", "bc") never collide.
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of JSON-serializable results keyed by content hash.
+
+    The memory tier is an LRU bounded by the encoded size of its entries.
+    The optional disk tier is a SQLite file that every worker process on the
+    host can share.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        db_path: str | None = None,
+        max_disk_entries: int = 100_000,
+        max_disk_bytes: int | None = None,
+        prune_every: int = 1000,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.prune_every = prune_every
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._puts_since_prune = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, value: bytes) -> None:
+        if key in self._entries:
+            self._size -= len(key) + len(self._entries.pop(key))
+        entry_size = len(key) + len(value)
+        if entry_size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._size += entry_size
+        while self._size > self.max_bytes:
+            old_key, old_value = self._entries.popitem(last=False)
+            self._size -= len(old_key) + len(old_value)
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(value)
+
+            if self.db_path:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE results SET accessed = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+                    conn.commit()
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return json.loads(row[0])
+
+            self.misses += 1
+            return None
+
+    def get_many(self, keys: list[str]) -> list[Any | None]:
+        return [self.get(key) for key in keys]
+
+    def put(self, key: str, result: Any) -> None:
+        self.put_many([(key, result)])
+
+    def put_many(self, items: list[tuple[str, Any]]) -> None:
+        """
+        Store several results with one disk commit.
+        """
+        encoded = [
+            (key, json.dumps(result, separators=(",", ":")).encode("utf-8"))
+            for key, result in items
+        ]
+        with self._lock:
+            for key, value in encoded:
+                self._remember(key, value)
+            if self.db_path and encoded:
+                conn = self._connect()
+                now = time.time()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, accessed) "
+                    "VALUES (?, ?, ?)",
+                    [(key, value, now) for key, value in encoded],
+                )
+                self._puts_since_prune += len(encoded)
+                if self._puts_since_prune >= self.prune_every:
+                    self._prune(conn)
+                conn.commit()
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        self._puts_since_prune = 0
+        conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        if self.max_disk_bytes is not None:
+            # Keep the most recently used rows that fit in the byte budget.
+            conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM (SELECT key, SUM(length(value)) OVER "
+                "(ORDER BY accessed DESC) AS running FROM results) "
+                "WHERE running > ?)",
+                (self.max_disk_bytes,),
+            )
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_entries": len(self._entries),
+            "memory_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "disk_enabled": bool(self.db_path),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
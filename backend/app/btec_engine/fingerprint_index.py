@@ -0,0 +1,280 @@
+import fcntl
+import json
+import os
+import re
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+_HASH_BASE = np.uint64(1_000_003)
+_SEGMENT_GLOB = "segment-*.hashes.npy"
+# A segment is merged into the newer ones once they hold at least
+# 1 / MERGE_FACTOR of its fingerprints, so sizes grow geometrically.
+MERGE_FACTOR = 2
+MAX_SEGMENTS = 8
+
+
+def winnow(text: str, k: int = 15, window: int = 10) -> np.ndarray:
+    """
+    Winnowing fingerprints of `text` as a sorted array of unique uint64 hashes.
+
+    Any shared passage of at least `k + window - 1` normalized characters is
+    guaranteed to produce at least one common fingerprint.
+    """
+    normalized = _NON_WORD_RE.sub("", text.lower())
+    if len(normalized) < k:
+        return np.empty(0, dtype=np.uint64)
+
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(
+        np.uint64
+    )
+    count = len(codes) - k + 1
+    # Polynomial hash of every k-gram, wrapping modulo 2**64.
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(k):
+        hashes = hashes * _HASH_BASE + codes[offset : offset + count]
+
+    if count <= window:
+        return np.unique(hashes[[int(np.argmin(hashes))]])
+    windows = sliding_window_view(hashes, window)
+    picked = np.argmin(windows, axis=1) + np.arange(len(windows))
+    return np.unique(hashes[picked])
+
+
+def _next_stem(segment_names: list[str]) -> str:
+    last = max(segment_names, default=None)
+    number = int(last.split("-")[1].split(".")[0]) + 1 if last else 0
+    return f"segment-{number:08d}"
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class _Segment:
+    def __init__(self, hashes_path: Path) -> None:
+        self.name = hashes_path.name
+        # mmap'd read-only: every worker shares the same page cache copy.
+        self.hashes = np.load(hashes_path, mmap_mode="r")
+        self.docs = np.load(
+            hashes_path.with_name(self.name.replace(".hashes.", ".docs.")),
+            mmap_mode="r",
+        )
+
+
+class FingerprintIndex:
+    """
+    Append-only store of winnowing fingerprints on disk.
+
+    Each append writes an immutable segment of sorted hashes with the matching
+    document numbers; lookups binary-search every segment. Segments are memory
+    mapped, so any number of worker processes can open the same directory
+    without copying it into their heap.
+
+    Appends merge the newest segments as they grow, so there are only ever
+    about log2(fingerprints) of them and never more than `max_segments`.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        k: int = 15,
+        window: int = 10,
+        max_segments: int = MAX_SEGMENTS,
+    ) -> None:
+        self.directory = Path(directory)
+        self.k = k
+        self.window = window
+        self.max_segments = max_segments
+        self._segments: dict[str, _Segment] = {}
+        self._document_ids: list[str] = []
+        # Bytes of documents.jsonl already read into `_document_ids`.
+        self._documents_offset = 0
+        self._lock = threading.Lock()
+
+    @property
+    def _lock_path(self) -> Path:
+        return self.directory / ".lock"
+
+    @property
+    def _documents_path(self) -> Path:
+        return self.directory / "documents.jsonl"
+
+    def _refresh(self) -> None:
+        # Pick up segments written by other processes since the last call.
+        names = {path.name for path in self.directory.glob(_SEGMENT_GLOB)}
+        for name in list(self._segments):
+            if name not in names:
+                del self._segments[name]
+        for name in sorted(names - self._segments.keys()):
+            try:
+                self._segments[name] = _Segment(self.directory / name)
+            except FileNotFoundError:
+                # Removed by a concurrent compaction; its data lives on in
+                # the merged segment.
+                continue
+
+    def _refresh_documents(self) -> None:
+        # Reads only what was appended since the last call, without the file
+        # lock; a last line another process is still writing has no newline
+        # yet and is picked up by a later refresh.
+        if not self._documents_path.exists():
+            return
+        with open(self._documents_path, "rb") as documents:
+            documents.seek(self._documents_offset)
+            for line in documents:
+                if not line.endswith(b"\n"):
+                    break
+                self._document_ids.append(json.loads(line)["document_id"])
+                self._documents_offset += len(line)
+
+    def add(self, documents: list[tuple[str, str]]) -> None:
+        if not documents:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fingerprints = [winnow(text, self.k, self.window) for _, text in documents]
+
+        with self._lock, _locked(self._lock_path):
+            self._refresh_documents()
+            first_doc = len(self._document_ids)
+            hashes = np.concatenate(fingerprints)
+            docs = np.concatenate(
+                [
+                    np.full(len(prints), first_doc + offset, dtype=np.uint32)
+                    for offset, prints in enumerate(fingerprints)
+                ]
+            )
+            # Document ids are recorded before the segment that references
+            # them becomes visible to readers.
+            with open(self._documents_path, "ab") as manifest:
+                for document_id, _ in documents:
+                    line = (json.dumps({"document_id": document_id}) + "\n").encode()
+                    manifest.write(line)
+                    self._document_ids.append(document_id)
+                    self._documents_offset += len(line)
+
+            if hashes.size:
+                self._refresh()
+                self._write_segment(_next_stem(list(self._segments)), hashes, docs)
+                self._refresh()
+                self._merge_newest()
+
+    def _merge_newest(self) -> None:
+        names = sorted(self._segments)
+        sizes = [len(self._segments[name].hashes) for name in names]
+        # Fold older segments into the newest while they are not much larger.
+        take = 1
+        while take < len(names) and sizes[-take - 1] <= MERGE_FACTOR * sum(
+            sizes[-take:]
+        ):
+            take += 1
+        if len(names) - take + 1 > self.max_segments:
+            take = len(names)
+        if take > 1:
+            self._merge(names[-take:])
+
+    def _merge(self, names: list[str]) -> None:
+        # Callers hold both locks and have refreshed the segments.
+        segments = [self._segments[name] for name in names]
+        hashes = np.concatenate([segment.hashes for segment in segments])
+        docs = np.concatenate([segment.docs for segment in segments])
+        self._write_segment(_next_stem(list(self._segments)), hashes, docs)
+        for name in names:
+            del self._segments[name]
+            (self.directory / name).unlink()
+            (self.directory / name.replace(".hashes.", ".docs.")).unlink()
+
+    def _write_segment(self, stem: str, hashes: np.ndarray, docs: np.ndarray) -> None:
+        order = np.argsort(hashes, kind="stable")
+        # The hashes file is published last because readers glob for it.
+        for suffix, array in (
+            (".docs.npy", docs[order]),
+            (".hashes.npy", hashes[order]),
+        ):
+            path = self.directory / f"{stem}{suffix}"
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, "wb") as tmp:
+                np.save(tmp, array)
+            os.replace(tmp_path, path)
+
+    def lookup(
+        self, text: str, min_shared: int = 1, exclude: str | None = None
+    ) -> list[dict]:
+        """
+        Prior documents sharing at least `min_shared` fingerprints with `text`,
+        most similar first, leaving out earlier copies of document `exclude`.
+        """
+        query = winnow(text, self.k, self.window)
+        if query.size == 0 or not self.directory.exists():
+            return []
+
+        with self._lock:
+            self._refresh()
+            matches = []
+            for segment in self._segments.values():
+                left = np.searchsorted(segment.hashes, query, side="left")
+                right = np.searchsorted(segment.hashes, query, side="right")
+                for query_idx in np.nonzero(left < right)[0]:
+                    docs = segment.docs[left[query_idx] : right[query_idx]]
+                    matches.append(
+                        (docs.astype(np.uint64) << np.uint64(32)) | np.uint64(query_idx)
+                    )
+            if not matches:
+                return []
+
+            # Each (document, fingerprint) pair counts once, even if it is
+            # momentarily visible in both an old and a compacted segment.
+            pairs = np.unique(np.concatenate(matches))
+            doc_numbers, shared = np.unique(pairs >> np.uint64(32), return_counts=True)
+            keep = shared >= min_shared
+            if doc_numbers[keep].size and doc_numbers[keep].max() >= len(
+                self._document_ids
+            ):
+                self._refresh_documents()
+            document_ids = list(self._document_ids)
+
+        results = [
+            {
+                "document_id": document_ids[int(doc)],
+                "shared_fingerprints": int(count),
+                "containment": float(count / query.size),
+            }
+            for doc, count in zip(doc_numbers[keep], shared[keep], strict=True)
+            # Ids still being appended by another writer are left for a
+            # later lookup.
+            if int(doc) < len(document_ids) and document_ids[int(doc)] != exclude
+        ]
+        results.sort(key=lambda match: match["shared_fingerprints"], reverse=True)
+        return results
+
+    def compact(self) -> None:
+        """
+        Merge all segments into one so lookups touch a single array.
+        """
+        with self._lock, _locked(self._lock_path):
+            self._refresh()
+            if len(self._segments) < 2:
+                return
+            self._merge(sorted(self._segments))
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self.directory.exists():
+                self._refresh()
+                self._refresh_documents()
+            return {
+                "documents": len(self._document_ids),
+                "segments": len(self._segments),
+                "fingerprints": sum(len(s.hashes) for s in self._segments.values()),
+            }
@@ -0,0 +1,149 @@
+import hashlib
+import re
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+
+from app.btec_engine.text_evaluator import evaluate_text
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _stable_hash(value: str) -> int:
+    # Python's hash() is salted per process; signatures must be comparable
+    # across workers and runs.
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "big"
+    )
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) <= size:
+        shingles = {" ".join(tokens)} if tokens else set()
+    else:
+        shingles = {
+            " ".join(tokens[idx : idx + size]) for idx in range(len(tokens) - size + 1)
+        }
+    return np.fromiter(
+        (_stable_hash(shingle) for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (a * x + b) mod p for every shingle/permutation pair; 32-bit inputs
+        # and 31-bit coefficients keep the product inside uint64.
+        permuted = (hashes[:, None] * self._a + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0)
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int) -> set[tuple[int, int]]:
+    num_docs, num_perm = signatures.shape
+    rows = num_perm // bands
+    candidates: set[tuple[int, int]] = set()
+    for band in range(bands):
+        buckets: dict[bytes, list[int]] = defaultdict(list)
+        band_slice = signatures[:, band * rows : (band + 1) * rows]
+        for doc in range(num_docs):
+            buckets[band_slice[doc].tobytes()].append(doc)
+        for members in buckets.values():
+            if len(members) > 1:
+                candidates.update(combinations(members, 2))
+    return candidates
+
+
+def _clusters(num_docs: int, edges: list[tuple[int, int]]) -> list[list[int]]:
+    parent = list(range(num_docs))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for left, right in edges:
+        parent[find(left)] = find(right)
+
+    groups: dict[int, set[int]] = defaultdict(set)
+    for left, right in edges:
+        groups[find(left)].update((left, right))
+    return [sorted(members) for members in groups.values()]
+
+
+def find_suspicious_clusters(
+    submissions: list[tuple[str, str]],
+    threshold: float = 0.8,
+    num_perm: int = 128,
+    bands: int = 32,
+    shingle_size: int = 5,
+) -> dict:
+    """
+    Group near-duplicate submissions without comparing every pair.
+
+    MinHash signatures of word shingles are bucketed band by band; only pairs
+    sharing a bucket are rescored with `evaluate_text`, and pairs whose
+    Levenshtein ratio reaches `threshold` are joined into clusters.
+    """
+    hasher = MinHasher(num_perm=num_perm)
+    signatures = np.empty((len(submissions), num_perm), dtype=np.uint64)
+    blank: set[int] = set()
+    for row, (_, text) in enumerate(submissions):
+        hashes = shingle_hashes(text, shingle_size)
+        if hashes.size == 0:
+            blank.add(row)
+        signatures[row] = hasher.signature(hashes)
+    # Blank submissions share the empty signature but are not plagiarism.
+    candidates = {
+        pair
+        for pair in lsh_candidate_pairs(signatures, bands)
+        if pair[0] not in blank and pair[1] not in blank
+    }
+
+    flagged: list[tuple[int, int]] = []
+    pairs: dict[tuple[int, int], dict] = {}
+    for left, right in sorted(candidates):
+        scores = evaluate_text(submissions[left][1], submissions[right][1])
+        if scores["levenshtein_ratio"] < threshold:
+            continue
+        flagged.append((left, right))
+        pairs[(left, right)] = {
+            "submission_a": submissions[left][0],
+            "submission_b": submissions[right][0],
+            "jaccard_estimate": float(np.mean(signatures[left] == signatures[right])),
+            **scores,
+        }
+
+    clusters = []
+    for members in _clusters(len(submissions), flagged):
+        member_set = set(members)
+        clusters.append(
+            {
+                "submissions": [submissions[idx][0] for idx in members],
+                "pairs": [
+                    pair
+                    for (left, right), pair in pairs.items()
+                    if left in member_set and right in member_set
+                ],
+            }
+        )
+    clusters.sort(key=lambda cluster: len(cluster["submissions"]), reverse=True)
+
+    return {
+        "submissions": len(submissions),
+        "candidate_pairs": len(candidates),
+        "clusters": clusters,
+    }
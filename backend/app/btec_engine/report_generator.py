@@ -1,4 +1,136 @@
-from weasyprint import HTML
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+from weasyprint.urls import URLFetcher
+
+from app.core.config import settings
+
+TEMPLATE_DIR = Path(__file__).parents[1] / "report-templates"
+# The Cairo (Arabic) and Inter fonts shipped with the Flutter app.
+DEFAULT_FONT_DIR = Path(__file__).parents[3] / "Flutter" / "assets" / "fonts"
+DEFAULT_TEMPLATE = "student_report.html"
+STYLESHEET = "report.css"
+
 
 def generate_report(html_content: str, output_path: str):
-    HTML(string=html_content).write_pdf(output_path)
\ No newline at end of file
+    HTML(string=html_content, url_fetcher=get_renderer().url_fetcher).write_pdf(
+        output_path
+    )
+
+
+class ReportURLFetcher(URLFetcher):
+    """
+    Fetches only data: URLs and files inside `allowed_dirs`.
+
+    Report HTML comes from clients, so WeasyPrint's default fetcher would let
+    it embed any file the server can read or make requests on its behalf.
+    """
+
+    def __init__(self, allowed_dirs: list[Path]) -> None:
+        super().__init__(allowed_protocols={"data", "file"})
+        self.allowed_dirs = [directory.resolve() for directory in allowed_dirs]
+
+    def fetch(self, url, headers=None):
+        parts = urlsplit(url)
+        if parts.scheme.lower() == "file":
+            path = Path(url2pathname(parts.path)).resolve()
+            if parts.netloc not in ("", "localhost") or not any(
+                path.is_relative_to(directory) for directory in self.allowed_dirs
+            ):
+                raise ValueError(f"Report resource is not allowed: {url}")
+        return super().fetch(url, headers)
+
+
+class ReportRenderer:
+    """
+    Renders report templates from a data context.
+
+    Jinja templates are compiled once, and the stylesheet is parsed once
+    against a shared font configuration, so fonts are resolved on the first
+    report only instead of for every PDF.
+    """
+
+    def __init__(self, template_dir: Path, font_dir: Path | None) -> None:
+        self.template_dir = template_dir
+        self.font_dir = font_dir if font_dir and font_dir.is_dir() else None
+        self._env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(["html"]),
+            # Templates ship with the code; never stat them again.
+            auto_reload=False,
+        )
+        self.url_fetcher = ReportURLFetcher(
+            [template_dir, *([self.font_dir] if self.font_dir else [])]
+        )
+        self._font_config: FontConfiguration | None = None
+        self._stylesheet: CSS | None = None
+
+    @property
+    def font_config(self) -> FontConfiguration:
+        if self._font_config is None:
+            self._font_config = FontConfiguration()
+        return self._font_config
+
+    def stylesheet_source(self) -> str:
+        return self._env.get_template(STYLESHEET).render(
+            font_dir=self.font_dir.as_uri() if self.font_dir else None
+        )
+
+    @property
+    def stylesheet(self) -> CSS:
+        if self._stylesheet is None:
+            self._stylesheet = CSS(
+                string=self.stylesheet_source(),
+                font_config=self.font_config,
+                url_fetcher=self.url_fetcher,
+            )
+        return self._stylesheet
+
+    def render_html(self, context: dict[str, Any], template: str) -> str:
+        return self._env.get_template(template).render(context)
+
+    def render(
+        self,
+        context: dict[str, Any],
+        output_path: str,
+        template: str = DEFAULT_TEMPLATE,
+    ) -> None:
+        HTML(
+            string=self.render_html(context, template),
+            base_url=str(self.template_dir),
+            url_fetcher=self.url_fetcher,
+        ).write_pdf(
+            output_path,
+            stylesheets=[self.stylesheet],
+            font_config=self.font_config,
+        )
+
+    def warm_up(self) -> None:
+        self._env.get_template(DEFAULT_TEMPLATE)
+        # Parses the stylesheet and loads the fonts it embeds.
+        _ = self.stylesheet
+
+
+@lru_cache(maxsize=1)
+def get_renderer() -> ReportRenderer:
+    # One renderer per process: report pool workers keep it for their life.
+    font_dir = settings.BTEC_REPORT_FONT_DIR
+    return ReportRenderer(
+        TEMPLATE_DIR, Path(font_dir) if font_dir else DEFAULT_FONT_DIR
+    )
+
+
+def generate_report_from_context(
+    context: dict[str, Any], output_path: str, template: str = DEFAULT_TEMPLATE
+) -> None:
+    get_renderer().render(context, output_path, template)
+
+
+def warm_up() -> None:
+    get_renderer().warm_up()
@@ -0,0 +1,72 @@
+import numpy as np
+
+from app.btec_engine.audio_evaluator import SAMPLE_RATE
+
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+class RollingWindow:
+    """
+    Audio buffer for live transcription.
+
+    Incoming samples are appended until `step_seconds` of new audio arrived,
+    then the whole window is decoded again. Once the window is longer than
+    `commit_seconds`, every segment but the last (which may still be cut
+    mid-word) is committed and its audio dropped, so the buffer never grows
+    far past `window_seconds` however long the connection stays open.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        window_seconds: float = 30.0,
+        step_seconds: float = 2.0,
+        commit_seconds: float = 20.0,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.window = int(window_seconds * sample_rate)
+        self.step = int(step_seconds * sample_rate)
+        self.commit = int(commit_seconds * sample_rate)
+        self.audio = np.empty(0, dtype=np.float32)
+        # Samples already committed or dropped before the start of `audio`.
+        self.offset = 0
+        self._pending = 0
+
+    @property
+    def offset_seconds(self) -> float:
+        return self.offset / self.sample_rate
+
+    def feed(self, samples: np.ndarray) -> bool:
+        """
+        Append samples; True when enough new audio arrived to decode again.
+        """
+        self.audio = np.concatenate((self.audio, samples))
+        self._pending += len(samples)
+        return self._pending >= self.step or len(self.audio) >= self.window
+
+    def _drop(self, samples: int) -> None:
+        samples = min(max(samples, 0), len(self.audio))
+        self.audio = self.audio[samples:]
+        self.offset += samples
+
+    def advance(
+        self, segments: list[dict], final: bool = False
+    ) -> tuple[list[dict], list[dict]]:
+        """
+        Take the segments decoded from the current window (timestamps in
+        seconds from the start of the stream) and split them into committed
+        and still-partial segments, dropping the committed audio.
+        """
+        self._pending = 0
+        if final or len(self.audio) >= self.window:
+            # Whisper cannot see past one window, so everything is final.
+            self._drop(len(self.audio))
+            return segments, []
+        if len(self.audio) >= self.commit and len(segments) > 1:
+            committed, partial = segments[:-1], segments[-1:]
+            end = round(committed[-1]["end"] * self.sample_rate)
+            self._drop(end - self.offset)
+            return committed, partial
+        return [], segments
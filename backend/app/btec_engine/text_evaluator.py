@@ -1,5 +1,21 @@
+import re
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
 import textdistance
 import Levenshtein
+from rapidfuzz import process
+from rapidfuzz.distance import Indel
+
+# Bump whenever a metric changes so cached results are not reused.
+METRIC_VERSION = "3"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
 
 def evaluate_text(student_answer: str, model_answer: str) -> dict:
     similarity = textdistance.cosine.normalized_similarity(student_answer, model_answer)
@@ -8,4 +24,395 @@ def evaluate_text(student_answer: str, model_answer: str) -> dict:
     return {
         "similarity": similarity,
         "levenshtein_ratio": levenshtein_ratio,
-    }
\ No newline at end of file
+    }
+
+
+def _length_bound(student_length: int, model_length: int) -> float:
+    # Every length difference costs at least one insertion or deletion, so
+    # this is the best Levenshtein ratio the pair could possibly reach.
+    total = student_length + model_length
+    if total == 0:
+        return 1.0
+    return 1.0 - abs(student_length - model_length) / total
+
+
+def evaluate_text_bounded(
+    student_answer: str, model_answer: str, min_similarity: float
+) -> dict:
+    """
+    Like `evaluate_text`, but the Levenshtein ratio is only computed exactly
+    when it can reach `min_similarity`. Otherwise the length bound or the
+    banded edit distance stops early and `levenshtein_ratio` is an upper
+    bound, flagged with `exact=False`.
+    """
+    similarity = textdistance.cosine.normalized_similarity(student_answer, model_answer)
+    bound = _length_bound(len(student_answer), len(model_answer))
+    if bound < min_similarity:
+        return {"similarity": similarity, "levenshtein_ratio": bound, "exact": False}
+
+    levenshtein_ratio = Levenshtein.ratio(
+        student_answer, model_answer, score_cutoff=min_similarity
+    )
+    if levenshtein_ratio < min_similarity:
+        return {
+            "similarity": similarity,
+            "levenshtein_ratio": min_similarity,
+            "exact": False,
+        }
+    return {
+        "similarity": similarity,
+        "levenshtein_ratio": levenshtein_ratio,
+        "exact": True,
+    }
+
+
+def model_answer_features(model_answer: str) -> dict:
+    """
+    Model-side features that can be stored and reused for every evaluation
+    against the same model answer.
+    """
+    return {
+        "char_counts": dict(Counter(model_answer)),
+        "length": len(model_answer),
+    }
+
+
+def _cosine_batch(
+    student_answers: list[str],
+    model_answer: str,
+    char_counts: dict[str, int] | None = None,
+) -> np.ndarray:
+    # Character-count profile of the model answer, built once for the batch
+    # unless it was precomputed with `model_answer_features`.
+    if char_counts is None:
+        char_counts = Counter(model_answer)
+    vocabulary = {char: idx for idx, char in enumerate(char_counts)}
+    model_counts = np.fromiter(
+        char_counts.values(), dtype=np.int64, count=len(char_counts)
+    )
+
+    # Only characters that also occur in the model answer contribute to the
+    # intersection, so the student matrix is restricted to that vocabulary.
+    student_counts = np.zeros((len(student_answers), len(vocabulary)), dtype=np.int64)
+    lengths = np.zeros(len(student_answers), dtype=np.float64)
+    for row, answer in enumerate(student_answers):
+        lengths[row] = len(answer)
+        for char in answer:
+            idx = vocabulary.get(char)
+            if idx is not None:
+                student_counts[row, idx] += 1
+
+    intersection = np.minimum(student_counts, model_counts).sum(axis=1)
+    denominator = np.sqrt(lengths * len(model_answer))
+    similarity = np.divide(
+        intersection,
+        denominator,
+        out=np.zeros(len(student_answers), dtype=np.float64),
+        where=denominator > 0,
+    )
+    # Same conventions as textdistance: identical strings score 1.
+    identical = np.fromiter(
+        (answer == model_answer for answer in student_answers),
+        dtype=bool,
+        count=len(student_answers),
+    )
+    similarity[identical] = 1.0
+    return similarity
+
+
+def evaluate_text_batch(
+    student_answers: list[str],
+    model_answer: str,
+    min_similarity: float | None = None,
+    char_counts: dict[str, int] | None = None,
+) -> list[dict]:
+    if not student_answers:
+        return []
+
+    similarities = _cosine_batch(student_answers, model_answer, char_counts)
+    ratios = process.cdist(
+        [model_answer],
+        student_answers,
+        scorer=Indel.normalized_similarity,
+        score_cutoff=min_similarity,
+        dtype=np.float64,
+        workers=-1,
+    )[0]
+
+    if min_similarity is None:
+        return [
+            {
+                "similarity": float(similarity),
+                "levenshtein_ratio": float(ratio),
+            }
+            for similarity, ratio in zip(similarities, ratios, strict=True)
+        ]
+
+    results = []
+    for answer, similarity, ratio in zip(
+        student_answers, similarities, ratios, strict=True
+    ):
+        exact = bool(ratio >= min_similarity)
+        if not exact:
+            ratio = min(_length_bound(len(answer), len(model_answer)), min_similarity)
+        results.append(
+            {
+                "similarity": float(similarity),
+                "levenshtein_ratio": float(ratio),
+                "exact": exact,
+            }
+        )
+    return results
+
+
+@dataclass(frozen=True)
+class Metric:
+    name: str
+    # Relative cost; the cascade always runs cheaper metrics first.
+    cost: int
+    score: Callable[[str, str], float]
+
+
+METRICS: dict[str, Metric] = {}
+
+
+def register_metric(name: str, cost: int) -> Callable:
+    def decorator(score: Callable[[str, str], float]) -> Callable[[str, str], float]:
+        METRICS[name] = Metric(name=name, cost=cost, score=score)
+        return score
+
+    return decorator
+
+
+@register_metric("length_ratio", cost=1)
+def length_ratio(student_answer: str, model_answer: str) -> float:
+    longest = max(len(student_answer), len(model_answer))
+    if longest == 0:
+        return 1.0
+    return min(len(student_answer), len(model_answer)) / longest
+
+
+@register_metric("token_jaccard", cost=2)
+def token_jaccard(student_answer: str, model_answer: str) -> float:
+    student_tokens = set(_WORD_RE.findall(student_answer.lower()))
+    model_tokens = set(_WORD_RE.findall(model_answer.lower()))
+    union = student_tokens | model_tokens
+    if not union:
+        return 1.0
+    return len(student_tokens & model_tokens) / len(union)
+
+
+@register_metric("similarity", cost=5)
+def cosine_similarity(student_answer: str, model_answer: str) -> float:
+    return textdistance.cosine.normalized_similarity(student_answer, model_answer)
+
+
+@register_metric("levenshtein_ratio", cost=20)
+def levenshtein_ratio(student_answer: str, model_answer: str) -> float:
+    return Levenshtein.ratio(student_answer, model_answer)
+
+
+@dataclass(frozen=True)
+class CascadeStage:
+    metric: str
+    # A score below `reject_below` or above `accept_above` is conclusive and
+    # ends the cascade before the more expensive metrics run.
+    reject_below: float | None = None
+    accept_above: float | None = None
+
+
+CascadeProfile = Literal["fast", "full"]
+
+CASCADE_PROFILES: dict[CascadeProfile, list[CascadeStage]] = {
+    "fast": [
+        CascadeStage("length_ratio", reject_below=0.3),
+        CascadeStage("token_jaccard", reject_below=0.1, accept_above=0.95),
+        CascadeStage("similarity", reject_below=0.5),
+        CascadeStage("levenshtein_ratio"),
+    ],
+    "full": [
+        CascadeStage("length_ratio"),
+        CascadeStage("token_jaccard"),
+        CascadeStage("similarity"),
+        CascadeStage("levenshtein_ratio"),
+    ],
+}
+
+
+def evaluate_text_cascade(
+    student_answer: str, model_answer: str, profile: CascadeProfile = "full"
+) -> dict:
+    """
+    Run the metrics of a cascade profile from cheapest to most expensive,
+    stopping at the first conclusive score. Every metric of the profile has
+    a key, None when the cascade stopped before it, and `metrics_run` lists
+    the metrics that actually ran with their wall time.
+    """
+    stages = sorted(
+        CASCADE_PROFILES[profile], key=lambda stage: METRICS[stage.metric].cost
+    )
+    scores: dict[str, float | None] = {stage.metric: None for stage in stages}
+    metrics_run = []
+    decision = "complete"
+    for stage in stages:
+        metric = METRICS[stage.metric]
+        started = time.perf_counter()
+        score = metric.score(student_answer, model_answer)
+        metrics_run.append(
+            {
+                "name": metric.name,
+                "cost": metric.cost,
+                "seconds": time.perf_counter() - started,
+            }
+        )
+        scores[metric.name] = score
+        if stage.reject_below is not None and score < stage.reject_below:
+            decision = "rejected"
+            break
+        if stage.accept_above is not None and score > stage.accept_above:
+            decision = "accepted"
+            break
+
+    return {
+        **scores,
+        "profile": profile,
+        "decision": decision,
+        "metrics_run": metrics_run,
+    }
+
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?؟])\s+")
+
+
+def split_segments(text: str, granularity: str = "sentence") -> list[str]:
+    pattern = _PARAGRAPH_RE if granularity == "paragraph" else _SENTENCE_RE
+    return [segment.strip() for segment in pattern.split(text) if segment.strip()]
+
+
+def _last_row(student: list[str], model: list[str], min_match: float) -> list[float]:
+    # One row of the global alignment table, kept in O(len(model)) memory.
+    previous = [0.0] * (len(model) + 1)
+    for student_segment in student:
+        current = [0.0] * (len(model) + 1)
+        for j, model_segment in enumerate(model, start=1):
+            match = Levenshtein.ratio(student_segment, model_segment) - min_match
+            current[j] = max(previous[j - 1] + match, previous[j], current[j - 1])
+        previous = current
+    return previous
+
+
+def _align(
+    student: list[str],
+    model: list[str],
+    student_offset: int,
+    model_offset: int,
+    min_match: float,
+) -> list[tuple[int, int]]:
+    # Hirschberg's divide and conquer: split the student segments in half,
+    # find where the optimal path crosses the model segments with one forward
+    # and one backward pass, then recurse on both halves.
+    if not student or not model:
+        return []
+    if len(student) == 1:
+        scores = [Levenshtein.ratio(student[0], segment) for segment in model]
+        best = max(range(len(model)), key=scores.__getitem__)
+        if scores[best] - min_match > 0:
+            return [(student_offset, model_offset + best)]
+        return []
+
+    middle = len(student) // 2
+    forward = _last_row(student[:middle], model, min_match)
+    backward = _last_row(student[middle:][::-1], model[::-1], min_match)
+    split = max(
+        range(len(model) + 1),
+        key=lambda k: forward[k] + backward[len(model) - k],
+    )
+    return _align(
+        student[:middle], model[:split], student_offset, model_offset, min_match
+    ) + _align(
+        student[middle:],
+        model[split:],
+        student_offset + middle,
+        model_offset + split,
+        min_match,
+    )
+
+
+def evaluate_text_segments(
+    student_answer: str,
+    model_answer: str,
+    granularity: str = "sentence",
+    min_match: float = 0.3,
+) -> dict:
+    """
+    Align student and model answers segment by segment (paragraphs or
+    sentences) and score each aligned pair.
+
+    The alignment is global and order-preserving; pairs scoring below
+    `min_match` are left unaligned. Only linear rows of the alignment table
+    are held at any time, so memory depends on segment sizes rather than on
+    the product of the document lengths.
+    """
+    student = split_segments(student_answer, granularity)
+    model = split_segments(model_answer, granularity)
+    pairs = _align(student, model, 0, 0, min_match)
+
+    segments = []
+    best_by_model = [0.0] * len(model)
+    for student_index, model_index in pairs:
+        score = evaluate_text(student[student_index], model[model_index])
+        best_by_model[model_index] = score["levenshtein_ratio"]
+        segments.append(
+            {
+                "student_index": student_index,
+                "model_index": model_index,
+                **score,
+            }
+        )
+
+    return {
+        "granularity": granularity,
+        "student_segments": len(student),
+        "model_segments": len(model),
+        "segments": segments,
+        "aggregate": {
+            "matched_segments": len(segments),
+            "coverage": sum(best_by_model) / len(model) if model else 0.0,
+            "mean_levenshtein_ratio": (
+                sum(segment["levenshtein_ratio"] for segment in segments)
+                / len(segments)
+                if segments
+                else 0.0
+            ),
+        },
+    }
+
+
+def match_segments(
+    student_segments: list[str], model_answer: str, granularity: str = "sentence"
+) -> list[dict]:
+    """
+    Best-matching model answer segment for each student segment, scored
+    with the Levenshtein ratio. Segments are scored independently, so
+    segments of a transcript can be matched as they become available.
+    """
+    model = split_segments(model_answer, granularity)
+    if not model:
+        return [
+            {"model_index": None, "levenshtein_ratio": 0.0} for _ in student_segments
+        ]
+    if not student_segments:
+        return []
+    scores = process.cdist(
+        student_segments,
+        model,
+        scorer=Indel.normalized_similarity,
+        dtype=np.float64,
+        workers=-1,
+    )
+    best = scores.argmax(axis=1)
+    return [
+        {"model_index": int(idx), "levenshtein_ratio": float(scores[row, idx])}
+        for row, idx in enumerate(best)
+    ]
@@ -0,0 +1,126 @@
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def resident_memory_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak rather than current RSS, but available everywhere.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def default_torch_threads(processes: int) -> int:
+    """
+    Intra-op threads per inference process so that `processes` of them
+    share the machine's cores instead of oversubscribing them.
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+
+def _quantize_linear(model: Any) -> Any:
+    import torch
+
+    # Whisper's Linear subclass only casts weights to the input dtype, a
+    # no-op in float32; quantize_dynamic matches exact types, so its layers
+    # are presented as plain nn.Linear.
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+class WhisperModelManager:
+    """
+    Loads Whisper models on first use and keeps one read-only copy per
+    process, recording how long each load took and how much resident memory
+    it added.
+
+    `configure` sets the process's inference profile: with `quantize`, the
+    linear layers of models loaded on CPU are dynamically quantized to int8,
+    and `threads` caps torch's intra-op thread pool.
+    """
+
+    def __init__(self) -> None:
+        self._models: dict[str, Any] = {}
+        self._load_stats: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.quantize = False
+        self.threads: int | None = None
+
+    def configure(self, quantize: bool = False, threads: int | None = None) -> None:
+        self.quantize = quantize
+        self.threads = threads
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+
+    def get(self, name: str) -> Any:
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                # Imported here so processes that never transcribe (the API
+                # workers, the text evaluation pool) never pull in torch.
+                import whisper
+
+                rss_before = resident_memory_bytes()
+                started = time.perf_counter()
+                model = whisper.load_model(name)
+                model.eval()
+                quantized = self.quantize and model.device.type == "cpu"
+                if quantized:
+                    model = _quantize_linear(model)
+                load_seconds = time.perf_counter() - started
+                self._load_stats[name] = {
+                    "load_seconds": load_seconds,
+                    "resident_bytes_added": resident_memory_bytes() - rss_before,
+                    "device": model.device.type,
+                    "quantization": "int8" if quantized else None,
+                }
+                logger.info(
+                    "Loaded Whisper model %r in %.2fs (pid %d)",
+                    name,
+                    load_seconds,
+                    os.getpid(),
+                )
+                self._models[name] = model
+            return model
+
+    def profile(self, name: str) -> dict[str, Any]:
+        """
+        How `name` runs in this process, for response metadata.
+        """
+        import torch
+
+        self.get(name)
+        stats = self._load_stats[name]
+        return {
+            "model": name,
+            "device": stats["device"],
+            "quantization": stats["quantization"],
+            "torch_threads": torch.get_num_threads(),
+        }
+
+    def warm_up(self, names: list[str]) -> None:
+        for name in names:
+            self.get(name)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "resident_bytes": resident_memory_bytes(),
+            "models": {name: dict(stats) for name, stats in self._load_stats.items()},
+        }
+
+
+model_manager = WhisperModelManager()
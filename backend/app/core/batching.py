@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+WAIT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for up to `max_wait_seconds` or until
+    `max_batch_size` are waiting, runs them as one batch and hands every
+    caller its own result.
+
+    `run_batch` receives the list of items and must return a list of results
+    in the same order; a result that is an exception is raised to its caller
+    only.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list[Any]], Awaitable[list[Any]]],
+        *,
+        max_batch_size: int,
+        max_wait_seconds: float,
+    ) -> None:
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: list[tuple[Any, asyncio.Future[Any], float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._batch_sizes: Counter[int] = Counter()
+        self._wait_buckets: Counter[float] = Counter()
+        self._wait_total = 0.0
+        self._wait_count = 0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Any] = loop.create_future()
+        self._pending.append((item, future, time.monotonic()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future[Any], float]]) -> None:
+        started = time.monotonic()
+        self._batch_sizes[len(batch)] += 1
+        for _, _, enqueued_at in batch:
+            self._record_wait(started - enqueued_at)
+
+        try:
+            results = await self.run_batch([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch of {len(batch)} items returned {len(results)} results"
+                )
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future, _), result in zip(batch, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _record_wait(self, seconds: float) -> None:
+        self._wait_total += seconds
+        self._wait_count += 1
+        for bound in WAIT_BUCKETS:
+            if seconds <= bound:
+                self._wait_buckets[bound] += 1
+                return
+        self._wait_buckets[float("inf")] += 1
+
+    def stats(self) -> dict[str, Any]:
+        # Cumulative buckets, Prometheus style: each counts waits <= bound.
+        wait_histogram: dict[str, int] = {}
+        running = 0
+        for bound in (*WAIT_BUCKETS, float("inf")):
+            running += self._wait_buckets[bound]
+            wait_histogram["+Inf" if bound == float("inf") else str(bound)] = running
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_seconds": self.max_wait_seconds,
+            "pending": len(self._pending),
+            "batches": sum(self._batch_sizes.values()),
+            "batch_size_histogram": {
+                str(size): count for size, count in sorted(self._batch_sizes.items())
+            },
+            "wait_seconds_histogram": wait_histogram,
+            "wait_seconds_mean": (
+                self._wait_total / self._wait_count if self._wait_count else 0.0
+            ),
+        }
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; callers arriving while it is in
+    flight await the same result instead of starting a duplicate.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[str, asyncio.Task[Any]] = {}
+        self.started = 0
+        self.deduplicated = 0
+
+    def __contains__(self, key: str) -> bool:
+        # Until the caller's next await, `run(key, ...)` joins this flight
+        # instead of calling its `fn`.
+        return key in self._tasks
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._tasks.get(key)
+        if task is None:
+            self.started += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.deduplicated += 1
+        # Shielded so one caller disconnecting does not cancel the others.
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": len(self._tasks),
+            "started": self.started,
+            "deduplicated": self.deduplicated,
+        }
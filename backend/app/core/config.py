@@ -90,6 +90,92 @@ class Settings(BaseSettings):
     def emails_enabled(self) -> bool:
         return bool(self.SMTP_HOST and self.EMAILS_FROM_EMAIL)
 
+    # Process pool for CPU-bound BTEC text scoring (similarity, segment
+    # alignment, plagiarism); Whisper runs in the transcription pool below
+    BTEC_POOL_WORKERS: int = 2
+    BTEC_POOL_MAX_QUEUE: int = 32
+    # Audio uploads are streamed to the spool directory (e.g. a tmpfs such as
+    # /dev/shm; defaults to the system temp dir) and rejected past these limits
+    BTEC_AUDIO_SPOOL_DIR: str | None = None
+    BTEC_AUDIO_MAX_BYTES: int = 100 * 1024 * 1024
+    BTEC_AUDIO_MAX_SECONDS: float = 60 * 60
+    # Uploads up to this size are decoded in memory instead of spooled, as
+    # long as they last at most the given seconds
+    BTEC_AUDIO_IN_MEMORY_MAX_BYTES: int = 8 * 1024 * 1024
+    BTEC_AUDIO_IN_MEMORY_MAX_SECONDS: float = 30.0
+    BTEC_UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    # Process pool holding the Whisper model (one copy per worker); with
+    # preload the model is loaded during startup instead of on the first
+    # audio request. Every API process (WEB_CONCURRENCY) starts its own
+    # pools, so a host holds WEB_CONCURRENCY * BTEC_TRANSCRIBE_WORKERS
+    # Whisper copies next to WEB_CONCURRENCY * (BTEC_POOL_WORKERS +
+    # BTEC_REPORT_WORKERS) scoring and report processes.
+    BTEC_TRANSCRIBE_WORKERS: int = 1
+    BTEC_TRANSCRIBE_MAX_QUEUE: int = 16
+    BTEC_WHISPER_MODEL: str = "base"
+    BTEC_WHISPER_PRELOAD: bool = False
+    # API server processes; uvicorn starts this many workers when --workers
+    # is not given, so set it instead of passing --workers
+    WEB_CONCURRENCY: int = 1
+    # CPU inference profile: opt-in int8 dynamic quantization of the linear
+    # layers (faster, slightly less accurate) and torch intra-op threads per
+    # transcription worker, by default the cores divided among all API
+    # workers' transcription pools
+    BTEC_WHISPER_QUANTIZE: bool = False
+    BTEC_TORCH_THREADS: int | None = None
+    # Model size per request tier; requests without a tier use
+    # BTEC_WHISPER_MODEL
+    BTEC_WHISPER_TIER_MODELS: dict[str, str] = {
+        "fast": "tiny",
+        "standard": "base",
+        "accurate": "small",
+    }
+    # Concurrent short recordings are decoded together in one padded batch
+    BTEC_TRANSCRIBE_BATCH_SIZE: int = 8
+    BTEC_TRANSCRIBE_BATCH_WAIT_MS: int = 50
+    # Recordings longer than BTEC_TRANSCRIBE_CHUNK_MIN_SECONDS are split at
+    # silences into chunks transcribed in parallel by the transcription
+    # workers; BTEC_TRANSCRIBE_CHUNK_CONCURRENCY chunks per recording are
+    # queued at once so no worker waits for the next one
+    BTEC_TRANSCRIBE_CHUNK_SECONDS: float = 30.0
+    BTEC_TRANSCRIBE_CHUNK_MIN_SECONDS: float = 60.0
+    BTEC_TRANSCRIBE_CHUNK_CONCURRENCY: int = 4
+    # Submit-and-poll transcription jobs; audio is kept in the job directory
+    # until the job finishes, so it must survive restarts
+    BTEC_TRANSCRIPTION_JOB_DIR: str = "data/transcription-jobs"
+    BTEC_TRANSCRIPTION_JOB_POLL_SECONDS: float = 1.0
+    BTEC_TRANSCRIPTION_JOB_LEASE_SECONDS: float = 120.0
+    BTEC_TRANSCRIPTION_JOB_MAX_ATTEMPTS: int = 3
+    # Live transcription over WebSocket: the rolling window is decoded again
+    # every step and segments are committed once it passes the commit length
+    BTEC_STREAM_WINDOW_SECONDS: float = 30.0
+    BTEC_STREAM_STEP_SECONDS: float = 2.0
+    BTEC_STREAM_COMMIT_SECONDS: float = 20.0
+    # Transcripts cached by audio content hash, model and language
+    BTEC_TRANSCRIPT_CACHE_DB_PATH: str | None = "data/transcripts.sqlite3"
+    BTEC_TRANSCRIPT_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    BTEC_TRANSCRIPT_CACHE_DISK_MAX_BYTES: int = 256 * 1024 * 1024
+    # Process pool rendering PDF reports; batch outputs go under the output
+    # directory, one subdirectory per batch
+    BTEC_REPORT_WORKERS: int = 2
+    BTEC_REPORT_MAX_QUEUE: int = 64
+    BTEC_REPORT_OUTPUT_DIR: str = "data/reports"
+    # Running batches whose heartbeat is older than this are marked failed
+    BTEC_REPORT_BATCH_LEASE_SECONDS: float = 120.0
+    # Latest PDF per student, kept with the hash of its content so repeat
+    # requests with unchanged data reuse it
+    BTEC_REPORT_STORE_DIR: str = "data/report-store"
+    # Fonts embedded in templated reports; defaults to the fonts shipped with
+    # the Flutter app
+    BTEC_REPORT_FONT_DIR: str | None = None
+    # Result cache for text evaluation; the SQLite tier is shared by all
+    # workers on the host when a path is configured
+    BTEC_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    BTEC_CACHE_DB_PATH: str | None = None
+    BTEC_CACHE_DISK_MAX_ENTRIES: int = 100_000
+    # Memory-mapped winnowing fingerprints of past submissions
+    BTEC_FINGERPRINT_INDEX_DIR: str = "data/fingerprints"
+
     EMAIL_TEST_USER: EmailStr = "test@example.com"
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PoolSaturatedError(RuntimeError):
+    pass
+
+
+def _timed_call(fn: Callable[..., T], args: tuple[Any, ...]) -> tuple[float, T]:
+    # Runs in the worker process; the start timestamp lets the parent
+    # measure how long the task waited for a free worker.
+    started_at = time.time()
+    return started_at, fn(*args)
+
+
+class EvaluationPool:
+    """
+    Process pool for CPU-bound evaluation work, started and stopped with the
+    application lifespan so the event loop is never blocked by scoring or
+    transcription.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        max_queue: int,
+        window: int = 256,
+        name: str = "Evaluation pool",
+    ) -> None:
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: ProcessPoolExecutor | None = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._waits: deque[float] = deque(maxlen=window)
+
+    def start(
+        self,
+        initializer: Callable[..., object] | None = None,
+        initargs: tuple[Any, ...] = (),
+    ) -> None:
+        if self._executor is not None:
+            return
+        # spawn keeps the workers independent of threads in the parent
+        # (torch, rapidfuzz) which do not survive fork reliably.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initializer,
+            initargs=initargs,
+        )
+        logger.info("%s started with %d workers", self.name, self.workers)
+
+    def shutdown(self) -> None:
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        logger.info("%s stopped", self.name)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.workers)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            raise RuntimeError(f"{self.name} is not running")
+        if self._in_flight + 1 - self.workers > self.max_queue:
+            self._rejected += 1
+            raise PoolSaturatedError(f"{self.name} queue is full")
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        self._in_flight += 1
+        try:
+            started_at, result = await loop.run_in_executor(
+                self._executor, _timed_call, fn, args
+            )
+        finally:
+            self._in_flight -= 1
+        self._completed += 1
+        self._waits.append(max(0.0, started_at - submitted_at))
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        waits = list(self._waits)
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "wait_seconds": {
+                "last": waits[-1] if waits else 0.0,
+                "mean": sum(waits) / len(waits) if waits else 0.0,
+                "max": max(waits, default=0.0),
+            },
+        }
+
+
+evaluation_pool = EvaluationPool(
+    workers=settings.BTEC_POOL_WORKERS,
+    max_queue=settings.BTEC_POOL_MAX_QUEUE,
+)
+
+# Kept apart from the evaluation pool so only these processes load Whisper.
+transcription_pool = EvaluationPool(
+    workers=settings.BTEC_TRANSCRIBE_WORKERS,
+    max_queue=settings.BTEC_TRANSCRIBE_MAX_QUEUE,
+    name="Transcription pool",
+)
+
+report_pool = EvaluationPool(
+    workers=settings.BTEC_REPORT_WORKERS,
+    max_queue=settings.BTEC_REPORT_MAX_QUEUE,
+    name="Report pool",
+)
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from app import crud
+from app.btec_engine.audio_evaluator import transcribe_audio
+from app.core.config import settings
+from app.core.db import engine
+from app.core.executor import PoolSaturatedError, transcription_pool
+from app.models import TranscriptionJob
+
+logger = logging.getLogger(__name__)
+
+
+def _claim(lease_seconds: float) -> TranscriptionJob | None:
+    with Session(engine) as session:
+        return crud.claim_transcription_job(
+            session=session, lease_seconds=lease_seconds
+        )
+
+
+def _update(job_id: uuid.UUID, **fields: Any) -> None:
+    with Session(engine) as session:
+        crud.update_transcription_job(session=session, job_id=job_id, **fields)
+
+
+class TranscriptionJobWorker:
+    """
+    Polls the transcription job table and feeds claimed jobs to the
+    transcription pool. Started with the application lifespan; several API
+    workers can run one each against the same database.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+    ) -> None:
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._tasks: list[asyncio.Task[None]] = []
+        self._running: set[uuid.UUID] = set()
+        self._wakeup = asyncio.Event()
+        self._event_loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self) -> None:
+        self._event_loop = asyncio.get_running_loop()
+        self._tasks = [
+            asyncio.create_task(self._poll()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Hand unfinished jobs back instead of waiting for their lease to expire.
+        for job_id in list(self._running):
+            await run_in_threadpool(_update, job_id, status="queued")
+        self._running.clear()
+
+    def notify(self) -> None:
+        # Called from request handlers, possibly on a threadpool thread.
+        if self._event_loop is not None:
+            self._event_loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                job = await run_in_threadpool(_claim, self.lease_seconds)
+            except Exception:
+                logger.exception("Could not claim a transcription job")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if job.attempts > self.max_attempts:
+                # Claimed again after its worker died mid-run too often.
+                await run_in_threadpool(
+                    _update,
+                    job.id,
+                    status="failed",
+                    error="Transcription did not complete after repeated attempts",
+                    finished_at=datetime.now(timezone.utc),
+                )
+                _remove(job.audio_path)
+                continue
+            await self._process(job)
+
+    async def _heartbeat(self, job_id: uuid.UUID) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await run_in_threadpool(
+                _update, job_id, heartbeat_at=datetime.now(timezone.utc)
+            )
+
+    async def _process(self, job: TranscriptionJob) -> None:
+        self._running.add(job.id)
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            transcript = await transcription_pool.run(
+                transcribe_audio, job.audio_path, job.model_name
+            )
+        except PoolSaturatedError:
+            # The synchronous endpoints are keeping the pool busy; try later
+            # without counting this as a failed attempt.
+            await run_in_threadpool(
+                _update, job.id, status="queued", attempts=job.attempts - 1
+            )
+            await asyncio.sleep(self.poll_seconds)
+        except Exception as exc:
+            logger.exception("Transcription job %s failed", job.id)
+            if job.attempts < self.max_attempts:
+                await run_in_threadpool(_update, job.id, status="queued")
+            else:
+                await run_in_threadpool(
+                    _update,
+                    job.id,
+                    status="failed",
+                    error=str(exc)[:1024],
+                    finished_at=datetime.now(timezone.utc),
+                )
+                _remove(job.audio_path)
+        else:
+            await run_in_threadpool(
+                _update,
+                job.id,
+                status="done",
+                transcript=transcript,
+                finished_at=datetime.now(timezone.utc),
+            )
+            _remove(job.audio_path)
+        finally:
+            heartbeat.cancel()
+            self._running.discard(job.id)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+transcription_jobs = TranscriptionJobWorker(
+    concurrency=settings.BTEC_TRANSCRIBE_WORKERS,
+    poll_seconds=settings.BTEC_TRANSCRIPTION_JOB_POLL_SECONDS,
+    lease_seconds=settings.BTEC_TRANSCRIPTION_JOB_LEASE_SECONDS,
+    max_attempts=settings.BTEC_TRANSCRIPTION_JOB_MAX_ATTEMPTS,
+)
@@ -0,0 +1,425 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+import zipfile
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from app import crud
+from app.btec_engine.cache import content_key
+from app.core.config import settings
+from app.core.db import engine
+from app.core.executor import PoolSaturatedError, report_pool
+from app.models import StoredReport
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w.-]+", re.UNICODE)
+ARCHIVE_NAME = "reports.zip"
+# Kept in a subdirectory so the archive and file list only see student PDFs.
+BOOKLET_PATH = os.path.join("booklet", "booklet.pdf")
+# Finished HTML, or the data for the student report template
+ReportContent = str | dict[str, Any]
+# Same directory as report_generator.TEMPLATE_DIR, which the API processes
+# never import.
+TEMPLATE_DIR = Path(__file__).parents[1] / "report-templates"
+
+
+def report_filename(student_id: str) -> str:
+    return _UNSAFE_FILENAME_RE.sub("_", student_id) + ".pdf"
+
+
+@lru_cache(maxsize=1)
+def _template_fingerprint() -> str:
+    # A deploy that changes a template or the fonts invalidates every
+    # templated report.
+    parts = [str(settings.BTEC_REPORT_FONT_DIR)]
+    for path in sorted(TEMPLATE_DIR.iterdir()):
+        parts += [path.name, path.read_text(encoding="utf-8")]
+    return content_key(*parts)
+
+
+def report_content_hash(content: ReportContent) -> str:
+    if isinstance(content, dict):
+        data = json.dumps(content, sort_keys=True, separators=(",", ":"))
+        return content_key("context", _template_fingerprint(), data)
+    return content_key("html", content)
+
+
+def stored_report_path(store_dir: str, student_id: str, content_hash: str) -> str:
+    stem = report_filename(student_id)[: -len(".pdf")]
+    return os.path.join(store_dir, f"{stem}-{content_hash[:16]}.pdf")
+
+
+def link_report(source: str, target: str) -> None:
+    Path(target).unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # Store and output on different filesystems.
+        shutil.copyfile(source, target)
+
+
+def save_stored_reports(reports: list[StoredReport]) -> None:
+    with Session(engine) as session:
+        replaced = crud.save_stored_reports(session=session, reports=reports)
+    for path in replaced:
+        # Batches that used the old PDF hold their own link to it.
+        Path(path).unlink(missing_ok=True)
+
+
+def render_report(content: ReportContent, output_path: str) -> None:
+    # Imported in the worker so the API processes never load WeasyPrint.
+    from app.btec_engine.report_generator import (
+        generate_report,
+        generate_report_from_context,
+    )
+
+    if isinstance(content, dict):
+        generate_report_from_context(content, output_path)
+    else:
+        generate_report(content, output_path)
+
+
+def init_worker() -> None:
+    """
+    Report pool initializer: compile the templates and load the fonts once
+    per worker, before its first report.
+    """
+    try:
+        from app.btec_engine.report_generator import warm_up
+
+        warm_up()
+    except Exception:
+        # Reports still fail one by one with the real error.
+        logger.exception("Report renderer warm-up failed")
+
+
+def write_archive(output_dir: str) -> str:
+    archive_path = os.path.join(output_dir, ARCHIVE_NAME)
+    tmp_path = archive_path + ".tmp"
+    # PDFs are already compressed; storing them keeps zipping I/O-bound.
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for path in sorted(Path(output_dir).glob("*.pdf")):
+            archive.write(path, path.name)
+    os.replace(tmp_path, archive_path)
+    return archive_path
+
+
+def booklet_path(output_dir: str) -> str:
+    return os.path.join(output_dir, BOOKLET_PATH)
+
+
+def build_booklet(
+    entries: list[tuple[str, str]], partial_path: str, output_path: str
+) -> None:
+    """
+    Write the booklet to `partial_path`, which readers may follow while it
+    grows, and move it to `output_path` once it is complete.
+    """
+    from app.btec_engine.booklet import write_booklet
+
+    try:
+        write_booklet(entries, partial_path)
+    except BaseException:
+        Path(partial_path).unlink(missing_ok=True)
+        raise
+    os.replace(partial_path, output_path)
+
+
+def log_booklet_failure(task: "asyncio.Future[Any]") -> None:
+    # Done callback: the client may have gone before the build finished.
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Report booklet build failed", exc_info=task.exception())
+
+
+async def follow_file(
+    path: str,
+    writer: "asyncio.Future[Any]",
+    chunk_size: int = 64 * 1024,
+    poll_seconds: float = 0.05,
+) -> AsyncIterator[bytes]:
+    """
+    Yield the contents of a file while `writer` is still appending to it,
+    until the writer is done. Raises the writer's error, if any, after the
+    bytes written so far.
+    """
+    with open(path, "rb") as stream:
+        while True:
+            done = writer.done()
+            chunk = await run_in_threadpool(stream.read, chunk_size)
+            if chunk:
+                yield chunk
+            elif done:
+                break
+            else:
+                await asyncio.sleep(poll_seconds)
+    writer.result()
+
+
+def _update(
+    batch_id: uuid.UUID, stored: list[StoredReport] | None = None, **fields: Any
+) -> None:
+    if stored:
+        save_stored_reports(stored)
+    with Session(engine) as session:
+        crud.update_report_batch(session=session, batch_id=batch_id, **fields)
+
+
+def _fail_stale(lease_seconds: float) -> int:
+    with Session(engine) as session:
+        return crud.fail_stale_report_batches(
+            session=session, lease_seconds=lease_seconds
+        )
+
+
+def _lookup(
+    reports: list[tuple[str, ReportContent]],
+) -> tuple[dict[str, str], dict[str, StoredReport]]:
+    hashes = {
+        student_id: report_content_hash(content) for student_id, content in reports
+    }
+    with Session(engine) as session:
+        stored = crud.get_stored_reports(session=session, student_ids=list(hashes))
+    return hashes, stored
+
+
+class ReportBatchRunner:
+    """
+    Renders report batches on the report pool in the background of the API
+    process that accepted them, recording progress on the batch row at most
+    every `progress_seconds` so any API worker can report it. A heartbeat is
+    recorded every third of `lease_seconds`; batches whose heartbeat stopped
+    are marked failed by `recover()` and when they are read.
+
+    Every rendered PDF is kept in `store_dir` with the hash of its content;
+    a later batch links the stored PDF instead of rendering a student whose
+    data did not change.
+    """
+
+    def __init__(
+        self,
+        *,
+        store_dir: str,
+        progress_seconds: float = 1.0,
+        lease_seconds: float = 120.0,
+    ) -> None:
+        self.store_dir = store_dir
+        self.progress_seconds = progress_seconds
+        self.lease_seconds = lease_seconds
+        self._tasks: dict[uuid.UUID, asyncio.Task[None]] = {}
+
+    def submit(
+        self,
+        batch_id: uuid.UUID,
+        output_dir: str,
+        reports: list[tuple[str, ReportContent]],
+        archive: bool,
+        render: Callable[[ReportContent, str], None] = render_report,
+        force: bool = False,
+    ) -> None:
+        task = asyncio.create_task(
+            self._run(batch_id, output_dir, reports, archive, render, force)
+        )
+        self._tasks[batch_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(batch_id, None))
+
+    async def recover(self) -> None:
+        """
+        Mark batches left running by a worker that died as failed.
+        """
+        failed = await run_in_threadpool(_fail_stale, self.lease_seconds)
+        if failed:
+            logger.warning("Marked %d stale report batches failed", failed)
+
+    async def stop(self) -> None:
+        tasks = dict(self._tasks)
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for batch_id in tasks:
+            await run_in_threadpool(
+                _update,
+                batch_id,
+                status="failed",
+                error="Interrupted by shutdown",
+                finished_at=datetime.now(timezone.utc),
+            )
+
+    async def render_stored(
+        self,
+        student_id: str,
+        content: ReportContent,
+        force: bool = False,
+        render: Callable[[ReportContent, str], None] = render_report,
+    ) -> tuple[str, bool]:
+        """
+        Path of the stored PDF for one student's report, rendering it only if
+        the content changed since it was stored, and whether it was reused.
+        """
+        hashes, stored = await run_in_threadpool(_lookup, [(student_id, content)])
+        content_hash = hashes[student_id]
+        previous = stored.get(student_id)
+        if (
+            not force
+            and previous is not None
+            and previous.content_hash == content_hash
+            and os.path.isfile(previous.path)
+        ):
+            return previous.path, True
+        os.makedirs(self.store_dir, exist_ok=True)
+        store_path = stored_report_path(self.store_dir, student_id, content_hash)
+        tmp_path = f"{store_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            await report_pool.run(render, content, tmp_path)
+            os.replace(tmp_path, store_path)
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
+        await run_in_threadpool(
+            save_stored_reports,
+            [
+                StoredReport(
+                    student_id=student_id, content_hash=content_hash, path=store_path
+                )
+            ],
+        )
+        return store_path, False
+
+    async def _render(
+        self,
+        render: Callable[[ReportContent, str], None],
+        content: ReportContent,
+        path: str,
+    ) -> None:
+        while True:
+            try:
+                await report_pool.run(render, content, path)
+                return
+            except PoolSaturatedError:
+                # Other batches fill the queue; wait for a slot.
+                await asyncio.sleep(self.progress_seconds)
+
+    async def _heartbeat(self, batch_id: uuid.UUID) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await run_in_threadpool(
+                _update, batch_id, heartbeat_at=datetime.now(timezone.utc)
+            )
+
+    async def _run(
+        self,
+        batch_id: uuid.UUID,
+        output_dir: str,
+        reports: list[tuple[str, ReportContent]],
+        archive: bool,
+        render: Callable[[ReportContent, str], None],
+        force: bool,
+    ) -> None:
+        os.makedirs(output_dir, exist_ok=True)
+        os.makedirs(self.store_dir, exist_ok=True)
+        hashes, stored = await run_in_threadpool(_lookup, reports)
+        # Enough in flight to keep every worker busy without flooding the
+        # queue that other batches share.
+        limit = asyncio.Semaphore(report_pool.workers)
+        progress = {"completed": 0, "failed": 0, "reused": 0}
+        rendered: list[StoredReport] = []
+        last_flush = time.monotonic()
+        flushing = False
+
+        async def flush(**fields: Any) -> None:
+            new = rendered[:]
+            rendered.clear()
+            await run_in_threadpool(_update, batch_id, new, **progress, **fields)
+
+        async def reuse(student_id: str, path: str) -> bool:
+            previous = stored.get(student_id)
+            if force or previous is None:
+                return False
+            if previous.content_hash != hashes[student_id]:
+                return False
+            try:
+                await run_in_threadpool(link_report, previous.path, path)
+            except FileNotFoundError:
+                return False
+            return True
+
+        async def render_one(student_id: str, content: ReportContent) -> None:
+            nonlocal last_flush, flushing
+            path = os.path.join(output_dir, report_filename(student_id))
+            content_hash = hashes[student_id]
+            store_path = stored_report_path(self.store_dir, student_id, content_hash)
+            # Rendered aside and moved into place, so PDFs linked into earlier
+            # batches are never rewritten.
+            tmp_path = f"{store_path}.{batch_id.hex}.tmp"
+            async with limit:
+                try:
+                    if await reuse(student_id, path):
+                        progress["reused"] += 1
+                    else:
+                        await self._render(render, content, tmp_path)
+                        os.replace(tmp_path, store_path)
+                        await run_in_threadpool(link_report, store_path, path)
+                        rendered.append(
+                            StoredReport(
+                                student_id=student_id,
+                                content_hash=content_hash,
+                                path=store_path,
+                            )
+                        )
+                    progress["completed"] += 1
+                except Exception:
+                    logger.exception("Report for %s failed", student_id)
+                    progress["failed"] += 1
+                    Path(tmp_path).unlink(missing_ok=True)
+                    Path(path).unlink(missing_ok=True)
+            # One progress write at a time, so counters never go backwards.
+            if not flushing and time.monotonic() - last_flush >= self.progress_seconds:
+                flushing = True
+                try:
+                    await flush()
+                finally:
+                    flushing = False
+                    last_flush = time.monotonic()
+
+        heartbeat = asyncio.create_task(self._heartbeat(batch_id))
+        try:
+            await asyncio.gather(
+                *(render_one(student_id, content) for student_id, content in reports)
+            )
+            archive_path = None
+            if archive and progress["completed"]:
+                archive_path = await run_in_threadpool(write_archive, output_dir)
+        except Exception as exc:
+            logger.exception("Report batch %s failed", batch_id)
+            await flush(
+                status="failed",
+                error=str(exc)[:1024],
+                finished_at=datetime.now(timezone.utc),
+            )
+            return
+        finally:
+            heartbeat.cancel()
+        if progress["completed"]:
+            outcome = {"status": "done", "archive_path": archive_path}
+        else:
+            outcome = {"status": "failed", "error": "No report could be rendered"}
+        await flush(**outcome, finished_at=datetime.now(timezone.utc))
+
+
+report_batches = ReportBatchRunner(
+    store_dir=settings.BTEC_REPORT_STORE_DIR,
+    lease_seconds=settings.BTEC_REPORT_BATCH_LEASE_SECONDS,
+)
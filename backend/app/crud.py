@@ -1,10 +1,27 @@
+import os
 import uuid
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlmodel import Session, and_, or_, select
 
+from app.btec_engine.cache import normalize_answer
+from app.btec_engine.text_evaluator import METRIC_VERSION, model_answer_features
 from app.core.security import get_password_hash, verify_password
-from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
+from app.models import (
+    Evaluation,
+    Item,
+    ItemCreate,
+    ModelAnswer,
+    ModelAnswerCreate,
+    ReportBatch,
+    StoredReport,
+    TranscriptionJob,
+    User,
+    UserCreate,
+    UserUpdate,
+)
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -52,3 +69,247 @@ def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -
     session.commit()
     session.refresh(db_item)
     return db_item
+
+
+def _model_answer_feature_columns(text: str) -> dict[str, Any]:
+    # Scored as sent, like a model answer given inline; the normalized text
+    # is kept for lookups only.
+    return {
+        "normalized_text": normalize_answer(text),
+        "metric_version": METRIC_VERSION,
+        **model_answer_features(text),
+    }
+
+
+def create_model_answer(
+    *, session: Session, model_answer_in: ModelAnswerCreate
+) -> ModelAnswer:
+    db_obj = ModelAnswer.model_validate(
+        model_answer_in, update=_model_answer_feature_columns(model_answer_in.text)
+    )
+    session.add(db_obj)
+    session.commit()
+    session.refresh(db_obj)
+    return db_obj
+
+
+def get_model_answer(
+    *, session: Session, model_answer_id: uuid.UUID
+) -> ModelAnswer | None:
+    db_obj = session.get(ModelAnswer, model_answer_id)
+    if db_obj and db_obj.metric_version != METRIC_VERSION:
+        # Features were computed by an older metric version; refresh them once.
+        db_obj.sqlmodel_update(_model_answer_feature_columns(db_obj.text))
+        session.add(db_obj)
+        session.commit()
+        session.refresh(db_obj)
+    return db_obj
+
+
+def create_transcription_job(
+    *, session: Session, audio_path: str, model_name: str, filename: str | None
+) -> TranscriptionJob:
+    db_job = TranscriptionJob(
+        audio_path=audio_path, model_name=model_name, filename=filename
+    )
+    session.add(db_job)
+    session.commit()
+    session.refresh(db_job)
+    return db_job
+
+
+def claim_transcription_job(
+    *, session: Session, lease_seconds: float
+) -> TranscriptionJob | None:
+    now = datetime.now(timezone.utc)
+    # Running jobs whose heartbeat stopped belonged to a worker that died
+    # and are handed out again. SKIP LOCKED lets several API workers poll
+    # the same table without blocking each other.
+    statement = (
+        select(TranscriptionJob)
+        .where(
+            or_(
+                TranscriptionJob.status == "queued",
+                and_(
+                    TranscriptionJob.status == "running",
+                    TranscriptionJob.heartbeat_at
+                    < now - timedelta(seconds=lease_seconds),
+                ),
+            )
+        )
+        .order_by(TranscriptionJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    db_job = session.exec(statement).first()
+    if not db_job:
+        return None
+    db_job.sqlmodel_update(
+        {
+            "status": "running",
+            "attempts": db_job.attempts + 1,
+            "started_at": now,
+            "heartbeat_at": now,
+        }
+    )
+    session.add(db_job)
+    session.commit()
+    session.refresh(db_job)
+    return db_job
+
+
+def update_transcription_job(
+    *, session: Session, job_id: uuid.UUID, **fields: Any
+) -> TranscriptionJob | None:
+    db_job = session.get(TranscriptionJob, job_id)
+    if not db_job:
+        return None
+    db_job.sqlmodel_update(fields)
+    session.add(db_job)
+    session.commit()
+    session.refresh(db_job)
+    return db_job
+
+
+def create_evaluations(
+    *,
+    session: Session,
+    model_answer_id: uuid.UUID,
+    student_ids: list[str | None],
+    results: list[dict[str, Any]],
+) -> None:
+    session.add_all(
+        Evaluation(
+            model_answer_id=model_answer_id,
+            student_id=student_id,
+            similarity=result["similarity"],
+            levenshtein_ratio=result["levenshtein_ratio"],
+            exact=result.get("exact", True),
+        )
+        for student_id, result in zip(student_ids, results, strict=True)
+    )
+    session.commit()
+
+
+EVALUATION_EXPORT_COLUMNS = (
+    "id",
+    "model_answer_id",
+    "student_id",
+    "similarity",
+    "levenshtein_ratio",
+    "exact",
+    "created_at",
+)
+
+
+def iter_evaluation_rows(
+    *,
+    session: Session,
+    model_answer_id: uuid.UUID | None = None,
+    batch_size: int = 1000,
+) -> Iterator[tuple[Any, ...]]:
+    """
+    EVALUATION_EXPORT_COLUMNS of every evaluation in creation order, fetched
+    `batch_size` rows at a time through a server-side cursor so memory does
+    not grow with the table.
+    """
+    statement = select(
+        *(getattr(Evaluation, column) for column in EVALUATION_EXPORT_COLUMNS)
+    ).order_by(Evaluation.created_at, Evaluation.id)
+    if model_answer_id is not None:
+        statement = statement.where(Evaluation.model_answer_id == model_answer_id)
+    for row in session.exec(statement.execution_options(yield_per=batch_size)):
+        yield tuple(row)
+
+
+def create_report_batch(
+    *, session: Session, student_ids: list[str], output_root: str
+) -> ReportBatch:
+    db_batch = ReportBatch(
+        total=len(student_ids),
+        student_ids=student_ids,
+        output_dir="",
+        heartbeat_at=datetime.now(timezone.utc),
+    )
+    # One directory per batch, named after it.
+    db_batch.output_dir = os.path.join(output_root, str(db_batch.id))
+    session.add(db_batch)
+    session.commit()
+    session.refresh(db_batch)
+    return db_batch
+
+
+def update_report_batch(
+    *, session: Session, batch_id: uuid.UUID, **fields: Any
+) -> ReportBatch | None:
+    db_batch = session.get(ReportBatch, batch_id)
+    if not db_batch:
+        return None
+    db_batch.sqlmodel_update(fields)
+    session.add(db_batch)
+    session.commit()
+    session.refresh(db_batch)
+    return db_batch
+
+
+def fail_stale_report_batches(
+    *, session: Session, lease_seconds: float, batch_id: uuid.UUID | None = None
+) -> int:
+    """
+    Mark running batches whose heartbeat is older than the lease as failed,
+    only `batch_id` if given, and return how many were marked.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=lease_seconds)
+    statement = select(ReportBatch).where(
+        ReportBatch.status == "running", ReportBatch.heartbeat_at < cutoff
+    )
+    if batch_id is not None:
+        statement = statement.where(ReportBatch.id == batch_id)
+    db_batches = session.exec(statement).all()
+    for db_batch in db_batches:
+        db_batch.sqlmodel_update(
+            {
+                "status": "failed",
+                "error": "Report worker stopped before the batch finished",
+                "finished_at": now,
+            }
+        )
+        session.add(db_batch)
+    session.commit()
+    return len(db_batches)
+
+
+def get_stored_reports(
+    *, session: Session, student_ids: list[str]
+) -> dict[str, StoredReport]:
+    statement = select(StoredReport).where(StoredReport.student_id.in_(student_ids))
+    return {report.student_id: report for report in session.exec(statement)}
+
+
+def save_stored_reports(*, session: Session, reports: list[StoredReport]) -> list[str]:
+    """
+    Insert or replace the stored report of each student and return the paths
+    of the PDFs they replace.
+    """
+    existing = get_stored_reports(
+        session=session, student_ids=[report.student_id for report in reports]
+    )
+    replaced = []
+    for report in reports:
+        db_report = existing.get(report.student_id)
+        if db_report is None:
+            session.add(report)
+            continue
+        if db_report.path != report.path:
+            replaced.append(db_report.path)
+        db_report.sqlmodel_update(
+            {
+                "content_hash": report.content_hash,
+                "path": report.path,
+                "updated_at": report.updated_at,
+            }
+        )
+        session.add(db_report)
+    session.commit()
+    return replaced
@@ -1,9 +1,20 @@
 # import sentry_sdk
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 from app.api.main import api_router
+from app.api.uploads import UploadSizeLimitMiddleware
+from app.btec_engine.audio_evaluator import init_worker, model_stats
+from app.btec_engine.whisper_models import default_torch_threads
 from app.core.config import settings
+from app.core.executor import evaluation_pool, report_pool, transcription_pool
+from app.core.jobs import transcription_jobs
+from app.core.reports import init_worker as init_report_worker
+from app.core.reports import report_batches
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -16,8 +27,40 @@ if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     pass
 
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    evaluation_pool.start()
+    threads = settings.BTEC_TORCH_THREADS or default_torch_threads(
+        settings.WEB_CONCURRENCY * settings.BTEC_TRANSCRIBE_WORKERS
+    )
+    preload = [settings.BTEC_WHISPER_MODEL] if settings.BTEC_WHISPER_PRELOAD else []
+    transcription_pool.start(
+        initializer=init_worker,
+        initargs=(settings.BTEC_WHISPER_QUANTIZE, threads, preload),
+    )
+    if preload:
+        # Every transcription worker loads the model as it starts; one task
+        # per worker makes them all start before we accept traffic.
+        await asyncio.gather(
+            *(
+                transcription_pool.run(model_stats)
+                for _ in range(transcription_pool.workers)
+            )
+        )
+    report_pool.start(initializer=init_report_worker)
+    await report_batches.recover()
+    transcription_jobs.start()
+    yield
+    await transcription_jobs.stop()
+    await report_batches.stop()
+    report_pool.shutdown()
+    transcription_pool.shutdown()
+    evaluation_pool.shutdown()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
@@ -32,5 +75,8 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+# Refuse oversized audio uploads before the multipart body is buffered
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Include API routers
 app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file
@@ -1,6 +1,9 @@
 import uuid
+from datetime import datetime, timezone
+from typing import Any
 
 from pydantic import EmailStr
+from sqlalchemy import JSON, Column, Text
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -111,3 +114,181 @@ class TokenPayload(SQLModel):
 class NewPassword(SQLModel):
     token: str
     new_password: str = Field(min_length=8, max_length=128)
+
+
+# Shared properties
+class ModelAnswerBase(SQLModel):
+    title: str = Field(min_length=1, max_length=255)
+    text: str = Field(min_length=1, sa_column=Column(Text, nullable=False))
+
+
+# Properties to receive on model answer creation
+class ModelAnswerCreate(ModelAnswerBase):
+    pass
+
+
+# Database model; the features are precomputed from the text so an
+# evaluation only has to process the student side
+class ModelAnswer(ModelAnswerBase, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    normalized_text: str = Field(sa_column=Column(Text, nullable=False))
+    char_counts: dict[str, int] = Field(sa_column=Column(JSON, nullable=False))
+    length: int
+    metric_version: str = Field(max_length=16)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+# One student answer scored against a stored model answer
+class Evaluation(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    model_answer_id: uuid.UUID = Field(
+        foreign_key="modelanswer.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    student_id: str | None = Field(default=None, max_length=255)
+    similarity: float
+    levenshtein_ratio: float
+    exact: bool = True
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+# Properties to return via API, id is always required
+class ModelAnswerPublic(ModelAnswerBase):
+    id: uuid.UUID
+    length: int
+    created_at: datetime
+
+
+class ModelAnswersPublic(SQLModel):
+    data: list[ModelAnswerPublic]
+    count: int
+
+
+# Database model of a queued audio transcription; the row is the queue, so
+# jobs survive worker restarts
+class TranscriptionJob(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    status: str = Field(default="queued", max_length=16, index=True)
+    filename: str | None = Field(default=None, max_length=255)
+    audio_path: str = Field(max_length=1024)
+    model_name: str = Field(max_length=64)
+    transcript: str | None = Field(default=None, sa_column=Column(Text))
+    error: str | None = Field(default=None, max_length=1024)
+    attempts: int = 0
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: datetime | None = None
+    heartbeat_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+# Properties to return via API, id is always required
+class TranscriptionJobPublic(SQLModel):
+    id: uuid.UUID
+    status: str
+    filename: str | None
+    transcript: str | None
+    error: str | None
+    attempts: int
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+# A cohort of PDF reports rendered in the background
+class ReportBatch(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    status: str = Field(default="running", max_length=16, index=True)
+    total: int
+    completed: int = 0
+    failed: int = 0
+    # Completed reports served from the report store instead of rendered
+    reused: int = 0
+    output_dir: str = Field(max_length=1024)
+    archive_path: str | None = Field(default=None, max_length=1024)
+    error: str | None = Field(default=None, max_length=1024)
+    # Student ids as the client sent them, in request order
+    student_ids: list[str] = Field(
+        default_factory=list, sa_column=Column(JSON, nullable=False)
+    )
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Refreshed while the batch renders; a running batch whose heartbeat
+    # stopped belonged to a worker that died
+    heartbeat_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+# Latest PDF rendered for a student and the hash of the content it was
+# rendered from, so unchanged reports are never rendered twice
+class StoredReport(SQLModel, table=True):
+    student_id: str = Field(primary_key=True, max_length=255)
+    content_hash: str = Field(max_length=64)
+    path: str = Field(max_length=1024)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class ReportFile(SQLModel):
+    student_id: str
+    url: str
+
+
+# Properties to return via API, with download links once the batch is done
+class ReportBatchPublic(SQLModel):
+    id: uuid.UUID
+    status: str
+    total: int
+    completed: int
+    failed: int
+    reused: int
+    error: str | None
+    created_at: datetime
+    finished_at: datetime | None
+    archive_url: str | None = None
+    booklet_url: str | None = None
+    files: list[ReportFile] = []
+
+
+# One student's report, given as finished HTML or as the data for the report
+# template
+class StudentReport(SQLModel):
+    student_id: str = Field(min_length=1, max_length=255)
+    html: str | None = None
+    context: dict[str, Any] | None = None
+
+
+# Payload for rendering the reports of a whole cohort
+class ReportBatchCreate(SQLModel):
+    reports: list[StudentReport] = Field(min_length=1)
+    archive: bool = True
+    # Render every report even when the stored PDF is up to date
+    force: bool = False
+
+
+# Payload for scoring a whole class against one model answer, given as text
+# or as the id of a stored model answer
+class TextBatchEvaluate(SQLModel):
+    model_answer: str | None = None
+    model_answer_id: uuid.UUID | None = None
+    student_answers: list[str] = Field(min_length=1)
+    # Same order as student_answers; results against a stored model answer
+    # are recorded as evaluations under these ids
+    student_ids: list[str] | None = None
+    min_similarity: float | None = Field(default=None, ge=0, le=1)
+
+
+class PlagiarismSubmission(SQLModel):
+    submission_id: str = Field(min_length=1, max_length=255)
+    text: str
+
+
+# Payload for a cohort plagiarism check of one assignment
+class PlagiarismCheck(SQLModel):
+    assignment_id: str = Field(min_length=1, max_length=255)
+    submissions: list[PlagiarismSubmission] = Field(min_length=2)
+    threshold: float = Field(default=0.8, ge=0, le=1)
+
+
+# Payload for checking a submission against all previously indexed ones
+class FingerprintCheck(SQLModel):
+    document_id: str = Field(min_length=1, max_length=255)
+    text: str
+    min_shared: int = Field(default=5, ge=1)
+    index: bool = True
@@ -0,0 +1,80 @@
+"""
+Compare per-report render time of raw HTML (fonts and stylesheet resolved for
+every PDF) against the cached template renderer.
+
+    python scripts/benchmark_reports.py --reports 50
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.btec_engine.report_generator import generate_report, get_renderer
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+
+def sample_context(index: int) -> dict:
+    return {
+        "language": "ar" if index % 2 else "en",
+        "unit": "Unit 4: Programming",
+        "student_name": f"Student {index}",
+        "student_id": f"S{index:04d}",
+        "cohort": "2025/26",
+        "criteria": [
+            {"criterion": f"P{n}", "grade": "Achieved", "feedback": "Clear work."}
+            for n in range(1, 8)
+        ],
+        "overall_grade": "Merit",
+        "comments": "تم إنجاز العمل بشكل جيد.",
+    }
+
+
+def timed(fn, count: int) -> list[float]:
+    timings = []
+    for index in range(count):
+        start = time.perf_counter()
+        fn(index)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summary(name: str, timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"{name:<10} first {timings[0] * 1000:8.1f} ms  "
+        f"mean {statistics.mean(timings) * 1000:8.1f} ms  "
+        f"p95 {p95 * 1000:8.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=20)
+    args = parser.parse_args()
+
+    renderer = get_renderer()
+    stylesheet = renderer.stylesheet_source()
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+
+        def raw(index: int) -> None:
+            # What callers did before: inline CSS parsed with every report.
+            html = renderer.render_html(sample_context(index), "student_report.html")
+            html = html.replace("</head>", f"<style>{stylesheet}</style></head>")
+            generate_report(html, str(out / f"raw-{index}.pdf"))
+
+        def cached(index: int) -> None:
+            renderer.render(sample_context(index), str(out / f"cached-{index}.pdf"))
+
+        logger.info(summary("raw", timed(raw, args.reports)))
+        logger.info(summary("cached", timed(cached, args.reports)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.api.api_v1.endpoints import btec
+from app.core.executor import PoolSaturatedError
+from app.models import ModelAnswerCreate
+
+
+def test_stored_model_answer_scores_like_the_inline_text(
+    client: TestClient, db: Session
+) -> None:
+    text = "Cash  flow forecasts\npredict receipts."
+    model_answer = crud.create_model_answer(
+        session=db,
+        model_answer_in=ModelAnswerCreate(title="Unit 3 task 2", text=text),
+    )
+    url = client.app.url_path_for("evaluate_text_endpoint")
+    student_answer = "Cash flow forecasts predict receipts."
+
+    stored = client.post(
+        url,
+        data={
+            "student_answer": student_answer,
+            "model_answer_id": str(model_answer.id),
+        },
+    )
+    inline = client.post(
+        url, data={"student_answer": student_answer, "model_answer": text}
+    )
+    assert stored.status_code == inline.status_code == 200
+    content = stored.json()["data"]
+    assert content["similarity"] == inline.json()["data"]["similarity"]
+    assert content["levenshtein_ratio"] == inline.json()["data"]["levenshtein_ratio"]
+    assert content["levenshtein_ratio"] < 1.0
+
+
+def test_evaluate_text_with_unknown_model_answer(client: TestClient) -> None:
+    response = client.post(
+        client.app.url_path_for("evaluate_text_endpoint"),
+        data={"student_answer": "Anything", "model_answer_id": str(uuid.uuid4())},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Model answer not found"
+
+
+def test_evaluate_text_requires_exactly_one_model_answer(client: TestClient) -> None:
+    response = client.post(
+        client.app.url_path_for("evaluate_text_endpoint"),
+        data={"student_answer": "Anything"},
+    )
+    assert response.status_code == 422
+
+
+def test_transcribe_chunked_cancels_other_chunks_on_failure(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    started: list[float] = []
+    seen: list[list[dict]] = []
+
+    async def run(_fn: Any, _source: Any, offset: float, *_args: Any) -> dict:
+        started.append(offset)
+        if offset == 0:
+            raise PoolSaturatedError("Transcription queue is full")
+        await asyncio.sleep(0.05)
+        return {"segments": [{"start": offset, "end": offset, "text": "x"}]}
+
+    monkeypatch.setattr(
+        btec, "_plan_chunks", lambda _source, _trim: ([(0, 10), (10, 20)], 20)
+    )
+    monkeypatch.setattr(btec.transcription_pool, "run", run)
+
+    async def main() -> None:
+        with pytest.raises(PoolSaturatedError):
+            await btec.transcribe_chunked("answer.wav", on_chunk=seen.append)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    assert len(started) == 2
+    assert seen == []
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import io
+import shutil
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from app.api.uploads import UploadSizeLimitMiddleware, spool_upload
+from app.core.config import settings
+
+
+def test_spool_upload_streams_and_cleans_up(tmp_path: Path) -> None:
+    file = UploadFile(io.BytesIO(b"RIFF" + b"\0" * 5000), filename="answer.wav")
+
+    async def spool() -> Path:
+        async with spool_upload(file, directory=str(tmp_path)) as upload:
+            assert upload.path.suffix == ".wav"
+            assert upload.size == 5004
+            assert upload.path.read_bytes()[:4] == b"RIFF"
+            assert upload.sha256 == hashlib.sha256(
+                b"RIFF" + b"\0" * 5000
+            ).hexdigest()
+            return upload.path
+
+    path = asyncio.run(spool())
+    assert not path.exists()
+
+
+def test_spool_upload_rejects_oversized_file(tmp_path: Path) -> None:
+    file = UploadFile(io.BytesIO(b"\0" * 5000), filename="answer.wav")
+
+    async def spool() -> None:
+        async with spool_upload(file, directory=str(tmp_path), max_bytes=1000):
+            pass
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(spool())
+    assert exc_info.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spool_upload_keeps_file_on_request(tmp_path: Path) -> None:
+    file = UploadFile(io.BytesIO(b"\0" * 10), filename="answer.mp3")
+
+    async def spool() -> Path:
+        async with spool_upload(file, directory=str(tmp_path)) as upload:
+            upload.keep = True
+            return upload.path
+
+    assert asyncio.run(spool()).exists()
+
+
+def _wav_bytes(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16_000)
+        wav.writeframes(b"\0\0" * int(seconds * 16_000))
+    return buffer.getvalue()
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_spool_upload_decodes_in_memory(tmp_path: Path) -> None:
+    file = UploadFile(io.BytesIO(_wav_bytes(1.5)), filename="answer.wav")
+
+    async def spool() -> None:
+        async with spool_upload(
+            file, directory=str(tmp_path), in_memory=True
+        ) as upload:
+            assert upload.audio is not None
+            assert upload.audio.dtype == np.int16
+            assert upload.duration == 1.5
+            assert upload.source is upload.audio
+            assert not upload.path.exists()
+
+    asyncio.run(spool())
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_spool_upload_spools_recordings_past_the_in_memory_length(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "BTEC_AUDIO_IN_MEMORY_MAX_SECONDS", 1.0)
+    data = _wav_bytes(1.5)
+    file = UploadFile(io.BytesIO(data), filename="answer.wav")
+
+    async def spool() -> None:
+        async with spool_upload(
+            file, directory=str(tmp_path), in_memory=True
+        ) as upload:
+            assert upload.audio is None
+            assert upload.path.read_bytes() == data
+            assert upload.duration == 1.5
+
+    asyncio.run(spool())
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_spool_upload_falls_back_to_file(tmp_path: Path) -> None:
+    file = UploadFile(io.BytesIO(b"not audio"), filename="answer.m4a")
+
+    async def spool() -> None:
+        async with spool_upload(
+            file, directory=str(tmp_path), in_memory=True
+        ) as upload:
+            assert upload.audio is None
+            assert upload.source == str(upload.path)
+            assert upload.path.read_bytes() == b"not audio"
+
+    asyncio.run(spool())
+
+
+def test_size_limit_middleware_rejects_bodies_while_receiving() -> None:
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=4096)
+    received: list[int] = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)) -> dict:
+        received.append(len(await file.read()))
+        return {}
+
+    client = TestClient(app)
+    ok = client.post("/upload", files={"file": ("a.wav", b"\0" * 1000)})
+    assert ok.status_code == 200
+
+    declared = client.post("/upload", files={"file": ("a.wav", b"\0" * 5000)})
+    assert declared.status_code == 413
+
+    def chunked_body():
+        yield b"--b\r\nContent-Disposition: form-data; name=file; "
+        yield b"filename=a.wav\r\n\r\n"
+        for _ in range(10):
+            yield b"\0" * 1000
+        yield b"\r\n--b--\r\n"
+
+    chunked = client.post(
+        "/upload",
+        content=chunked_body(),
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert chunked.status_code == 413
+    assert chunked.json()["detail"] == "Request body is too large"
+    assert received == [1000]
@@ -0,0 +1,144 @@
+import shutil
+import wave
+from itertools import pairwise
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.btec_engine.audio_evaluator import (
+    SAMPLE_RATE,
+    decode_audio,
+    plan_chunks,
+    plan_file_chunks,
+    speech_regions,
+    stitch_segments,
+    transcribe_batch,
+    trim_silence,
+)
+
+
+def _tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_speech_regions_skip_long_silences() -> None:
+    audio = np.concatenate(
+        [_silence(2), _tone(1), _silence(0.2), _tone(1), _silence(3), _tone(0.5)]
+    )
+    regions = speech_regions(audio)
+    # The short pause stays inside the first region; the long one splits.
+    assert len(regions) == 2
+    start, end = regions[0]
+    assert abs(start / SAMPLE_RATE - 1.85) < 0.05
+    assert abs(end / SAMPLE_RATE - 4.35) < 0.05
+
+
+def test_trim_silence_reports_removed_seconds() -> None:
+    audio = np.concatenate([_silence(2), _tone(1), _silence(2)])
+    trimmed, trimmed_seconds = trim_silence(audio)
+    assert len(trimmed) + trimmed_seconds * SAMPLE_RATE == len(audio)
+    assert 3.5 < trimmed_seconds < 4.0
+
+    trimmed, trimmed_seconds = trim_silence(_silence(1))
+    assert trimmed.size == 0
+    assert trimmed_seconds == 1.0
+
+
+def test_plan_chunks_cut_in_silences() -> None:
+    audio = np.concatenate([_tone(20), _silence(2), _tone(20), _silence(2), _tone(45)])
+    chunks = plan_chunks(audio, max_chunk_seconds=30)
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == len(audio)
+    assert all(left[1] == right[0] for left, right in pairwise(chunks))
+    # The first boundary falls inside the first pause.
+    assert 20 < chunks[0][1] / SAMPLE_RATE < 22
+    # 45 seconds of continuous speech is cut into pieces.
+    assert len(chunks) == 4
+
+    trimmed = plan_chunks(audio, max_chunk_seconds=30, trim=True)
+    assert sum(end - start for start, end in trimmed) < len(audio)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_plan_file_chunks_matches_decoded_plan(tmp_path: Path) -> None:
+    audio = np.concatenate([_tone(20), _silence(2), _tone(20), _silence(2), _tone(45)])
+    path = tmp_path / "answer.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((audio * 32767).astype(np.int16).tobytes())
+
+    decoded = decode_audio(str(path))
+    for trim in (False, True):
+        chunks, total_samples = plan_file_chunks(str(path), 30, trim)
+        assert chunks == plan_chunks(decoded, 30, trim)
+        assert total_samples == len(decoded)
+
+    part = decode_audio(str(path), start_seconds=21.0, duration_seconds=10.0)
+    assert len(part) == 10 * SAMPLE_RATE
+
+
+def test_stitch_segments_orders_by_time() -> None:
+    stitched = stitch_segments(
+        [
+            [{"start": 30.0, "end": 32.0, "text": "world"}],
+            [{"start": 0.5, "end": 2.0, "text": "hello"}],
+        ]
+    )
+    assert stitched["text"] == "hello world"
+    assert [segment["start"] for segment in stitched["segments"]] == [0.5, 30.0]
+
+
+def test_transcribe_batch_retries_doubtful_decodes_with_transcribe() -> None:
+    whisper = pytest.importorskip("whisper")
+    torch = pytest.importorskip("torch")
+
+    def decoded(text: str, **scores: float) -> SimpleNamespace:
+        defaults = {
+            "compression_ratio": 1.2,
+            "avg_logprob": -0.3,
+            "no_speech_prob": 0.01,
+        }
+        return SimpleNamespace(text=text, **{**defaults, **scores})
+
+    model = MagicMock()
+    model.device = torch.device("cpu")
+    model.transcribe.return_value = {"text": "retried"}
+    batch = [
+        decoded("fine"),
+        decoded("loop loop loop", compression_ratio=3.0),
+        decoded("???", avg_logprob=-2.0, no_speech_prob=0.9),
+        # Confident speech despite a high no-speech probability.
+        decoded("quiet", no_speech_prob=0.9),
+        decoded("again again again", compression_ratio=3.0, no_speech_prob=0.9),
+    ]
+    with (
+        patch(
+            "app.btec_engine.audio_evaluator.model_manager",
+            MagicMock(get=MagicMock(return_value=model)),
+        ),
+        patch.object(
+            whisper, "log_mel_spectrogram", return_value=torch.zeros(80, 3000)
+        ),
+        patch.object(whisper, "decode", return_value=batch),
+    ):
+        results = transcribe_batch([_tone(2), _tone(3), _tone(1), _tone(1), _tone(4)])
+
+    assert [result["text"] for result in results] == [
+        "fine",
+        "retried",
+        "",
+        "quiet",
+        "retried",
+    ]
+    retried = [len(call.args[0]) for call in model.transcribe.call_args_list]
+    assert retried == [3 * SAMPLE_RATE, 4 * SAMPLE_RATE]
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+
+from pypdf.annotations import Link  # noqa: E402
+
+from app.btec_engine.booklet import write_booklet  # noqa: E402
+
+
+def blank_pdf(path: Path, pages: int) -> str:
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(595, 842)
+    if pages > 1:
+        writer.add_annotation(0, Link(rect=(0, 0, 10, 10), target_page_index=1))
+    writer.write(path)
+    return str(path)
+
+
+def test_write_booklet_adds_contents_and_bookmarks(tmp_path: Path) -> None:
+    entries = [
+        ("Ali", blank_pdf(tmp_path / "a.pdf", 1)),
+        ("طالب", blank_pdf(tmp_path / "b.pdf", 3)),
+        ("Sara", blank_pdf(tmp_path / "c.pdf", 2)),
+    ]
+    tocs: list[list[tuple[str, int]]] = []
+
+    def toc(numbered: list[tuple[str, int]], path: str) -> None:
+        tocs.append(numbered)
+        blank_pdf(Path(path), 2)
+
+    output = tmp_path / "booklet.pdf"
+    write_booklet(entries, str(output), toc)
+
+    # The first pass assumed one contents page, so it ran again.
+    assert len(tocs) == 2
+    assert tocs[-1] == [("Ali", 3), ("طالب", 4), ("Sara", 7)]
+    reader = pypdf.PdfReader(output, strict=True)
+    assert len(reader.pages) == 8
+    assert [
+        (item.title, reader.get_destination_page_number(item))
+        for item in reader.outline
+    ] == [("Contents", 0), ("Ali", 2), ("طالب", 3), ("Sara", 6)]
+    # Links inside a report still point at its own pages.
+    link = reader.pages[3]["/Annots"][0].get_object()
+    assert link["/Dest"][0] == reader.pages[4].indirect_reference
+    assert not list(tmp_path.glob("*.toc.pdf"))
+
+
+def test_write_booklet_without_contents(tmp_path: Path) -> None:
+    output = tmp_path / "booklet.pdf"
+    write_booklet([("Ali", blank_pdf(tmp_path / "a.pdf", 2))], str(output), None)
+    reader = pypdf.PdfReader(output, strict=True)
+    assert len(reader.pages) == 2
+    assert [item.title for item in reader.outline] == ["Ali"]
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from app.btec_engine.cache import ResultCache, content_key, normalize_answer
+
+
+def test_content_key_hashes_the_raw_text() -> None:
+    assert content_key("1", "The answer") != content_key("1", "The  answer")
+    assert content_key("1", "The answer") != content_key("1", " The answer\n")
+    assert content_key("1", "ab", "c") != content_key("1", "a", "bc")
+
+
+def test_normalize_answer_collapses_whitespace() -> None:
+    assert normalize_answer("  The   answer\n") == "The answer"
+
+
+def test_memory_tier_evicts_to_byte_budget() -> None:
+    cache = ResultCache(max_bytes=200)
+    for idx in range(10):
+        cache.put(content_key(str(idx)), {"similarity": idx})
+    stats = cache.stats()
+    assert stats["memory_bytes"] <= 200
+    assert cache.get(content_key("9")) == {"similarity": 9}
+    assert cache.get(content_key("0")) is None
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "results.sqlite3")
+    key = content_key("1", "student", "model")
+    ResultCache(max_bytes=1024, db_path=db_path).put(key, {"similarity": 0.5})
+
+    other = ResultCache(max_bytes=1024, db_path=db_path)
+    assert other.get(key) == {"similarity": 0.5}
+    assert other.get(key) == {"similarity": 0.5}
+    stats = other.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+
+
+def test_disk_tier_evicts_to_byte_budget(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "transcripts.sqlite3")
+    cache = ResultCache(
+        max_bytes=0, db_path=db_path, max_disk_bytes=250, prune_every=1
+    )
+    for idx in range(5):
+        cache.put(content_key(str(idx)), "x" * 98)
+
+    # Each value encodes to 100 bytes; only the two most recent fit.
+    assert cache.get(content_key("4")) == "x" * 98
+    assert cache.get(content_key("3")) == "x" * 98
+    assert cache.get(content_key("2")) is None
+
+
+def test_put_many_and_get_many(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "results.sqlite3")
+    keys = [content_key(str(idx)) for idx in range(3)]
+    ResultCache(max_bytes=1024, db_path=db_path).put_many(
+        [(key, {"similarity": idx}) for idx, key in enumerate(keys[:2])]
+    )
+
+    other = ResultCache(max_bytes=1024, db_path=db_path)
+    assert other.get_many(keys) == [{"similarity": 0}, {"similarity": 1}, None]
+    assert other.stats()["disk_hits"] == 2
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from app.btec_engine.fingerprint_index import FingerprintIndex, winnow
+
+PRIOR = (
+    "Marketing mix decisions cover product, price, place and promotion, and "
+    "each element must be adapted to the target market segment."
+)
+
+
+def test_winnow_is_deterministic_and_sorted() -> None:
+    fingerprints = winnow(PRIOR)
+    assert fingerprints.size > 0
+    assert (fingerprints[:-1] < fingerprints[1:]).all()
+    assert (winnow(PRIOR.upper()) == fingerprints).all()
+    assert winnow("short").size == 0
+
+
+def test_lookup_finds_prior_documents_across_instances(tmp_path: Path) -> None:
+    writer = FingerprintIndex(str(tmp_path))
+    writer.add([("2024-s1", PRIOR), ("2024-s2", "Unrelated text about payroll.")])
+    writer.add([("2025-s7", "Cash flow statements summarise receipts.")])
+
+    reader = FingerprintIndex(str(tmp_path))
+    query = "Intro sentence. " + PRIOR[:90]
+    matches = reader.lookup(query, min_shared=3)
+    assert [match["document_id"] for match in matches] == ["2024-s1"]
+    assert matches[0]["shared_fingerprints"] >= 3
+
+    reader.compact()
+    assert reader.stats()["segments"] == 1
+    assert reader.stats()["documents"] == 3
+    assert reader.lookup(query, min_shared=3) == matches
+
+
+def test_add_keeps_the_segment_count_bounded(tmp_path: Path) -> None:
+    index = FingerprintIndex(str(tmp_path), max_segments=4)
+    for number in range(200):
+        index.add([(f"s{number}", f"Submission {number}: {PRIOR}")])
+        assert index.stats()["segments"] <= 4
+
+    assert len(list(tmp_path.glob("segment-*.npy"))) <= 8
+    stats = index.stats()
+    assert stats["documents"] == 200
+    matches = index.lookup(PRIOR, min_shared=3)
+    assert len(matches) == 200
+
+
+def test_lookup_waits_for_a_partly_written_document_id(tmp_path: Path) -> None:
+    index = FingerprintIndex(str(tmp_path))
+    index.add([("2024-s1", PRIOR)])
+    with open(tmp_path / "documents.jsonl", "a", encoding="utf-8") as manifest:
+        manifest.write('{"document_id": "2024-')
+
+    reader = FingerprintIndex(str(tmp_path))
+    assert [m["document_id"] for m in reader.lookup(PRIOR)] == ["2024-s1"]
+    with open(tmp_path / "documents.jsonl", "a", encoding="utf-8") as manifest:
+        manifest.write('s2"}\n')
+    assert reader.stats()["documents"] == 2
+
+
+def test_lookup_leaves_out_the_document_itself(tmp_path: Path) -> None:
+    index = FingerprintIndex(str(tmp_path))
+    index.add([("2024-s1", PRIOR), ("2024-s2", "Copied: " + PRIOR)])
+    matches = index.lookup(PRIOR, exclude="2024-s1")
+    assert [match["document_id"] for match in matches] == ["2024-s2"]
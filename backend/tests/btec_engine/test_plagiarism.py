@@ -0,0 +1,29 @@
+from app.btec_engine.plagiarism import find_suspicious_clusters
+
+ESSAY = (
+    "A business uses market research to understand customer needs before "
+    "launching a product, combining questionnaires, focus groups and "
+    "secondary data from published industry reports."
+)
+
+
+def test_find_suspicious_clusters_groups_near_duplicates() -> None:
+    submissions = [
+        ("s1", ESSAY),
+        ("s2", ESSAY.replace("focus groups", "focus group")),
+        ("s3", "Cash flow forecasts help a manager plan for shortfalls early."),
+        ("s4", ESSAY + " This is why research matters."),
+        ("s5", "Health and safety law protects employees at work every day."),
+    ]
+    result = find_suspicious_clusters(submissions, threshold=0.8)
+    assert result["submissions"] == 5
+    assert [cluster["submissions"] for cluster in result["clusters"]] == [
+        ["s1", "s2", "s4"]
+    ]
+    for pair in result["clusters"][0]["pairs"]:
+        assert pair["levenshtein_ratio"] >= 0.8
+
+
+def test_find_suspicious_clusters_without_matches() -> None:
+    result = find_suspicious_clusters([("s1", "alpha beta"), ("s2", "gamma delta")])
+    assert result["clusters"] == []
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pytest
+
+try:
+    from app.btec_engine.report_generator import (
+        DEFAULT_FONT_DIR,
+        TEMPLATE_DIR,
+        ReportRenderer,
+        ReportURLFetcher,
+    )
+except OSError:  # WeasyPrint is installed but Pango is not
+    pytest.skip("WeasyPrint system libraries missing", allow_module_level=True)
+
+
+def test_render_html_fills_and_escapes_the_template() -> None:
+    renderer = ReportRenderer(TEMPLATE_DIR, None)
+    html = renderer.render_html(
+        {
+            "language": "ar",
+            "unit": "Unit 4",
+            "student_name": "<b>Sara</b>",
+            "student_id": "S1",
+            "criteria": [{"criterion": "P1", "grade": "Achieved", "feedback": ""}],
+        },
+        "student_report.html",
+    )
+    assert 'dir="rtl"' in html
+    assert "&lt;b&gt;Sara&lt;/b&gt;" in html
+    assert "<td>P1</td>" in html
+
+
+def test_stylesheet_embeds_fonts_only_when_the_directory_exists(
+    tmp_path: Path,
+) -> None:
+    missing = ReportRenderer(TEMPLATE_DIR, tmp_path / "missing")
+    assert "@font-face" not in missing.stylesheet_source()
+
+    renderer = ReportRenderer(TEMPLATE_DIR, DEFAULT_FONT_DIR)
+    if renderer.font_dir is None:
+        pytest.skip("Flutter fonts not checked out")
+    css = renderer.stylesheet_source()
+    assert DEFAULT_FONT_DIR.as_uri() + "/Cairo-Regular.ttf" in css
+    assert (DEFAULT_FONT_DIR / "Cairo-Regular.ttf").is_file()
+
+
+def test_url_fetcher_only_serves_data_and_allowed_files(tmp_path: Path) -> None:
+    secret = tmp_path / "secret.txt"
+    secret.write_text("secret")
+    fetcher = ReportURLFetcher([TEMPLATE_DIR])
+
+    assert fetcher.fetch("data:text/plain,hello").read() == b"hello"
+    stylesheet = fetcher.fetch((TEMPLATE_DIR / "report.css").as_uri())
+    assert stylesheet.read()
+    stylesheet.close()
+
+    for url in (
+        secret.as_uri(),
+        (TEMPLATE_DIR / ".." / ".." / "main.py").as_uri(),
+        "http://169.254.169.254/latest/meta-data/",
+    ):
+        with pytest.raises(ValueError):
+            fetcher.fetch(url)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from app.btec_engine.streaming import RollingWindow, pcm16_to_float
+
+
+def test_pcm16_to_float_scales_samples() -> None:
+    data = np.array([0, 16384, -32768], dtype="<i2").tobytes()
+    assert pcm16_to_float(data).tolist() == [0.0, 0.5, -1.0]
+
+
+def test_rolling_window_commits_and_stays_bounded() -> None:
+    window = RollingWindow(
+        sample_rate=10, window_seconds=6, step_seconds=1, commit_seconds=4
+    )
+    assert not window.feed(np.zeros(5, dtype=np.float32))
+    assert window.feed(np.zeros(5, dtype=np.float32))
+    committed, partial = window.advance([{"start": 0.0, "end": 1.0, "text": "a"}])
+    assert committed == []
+    assert partial[0]["text"] == "a"
+
+    window.feed(np.zeros(35, dtype=np.float32))
+    segments = [
+        {"start": 0.0, "end": 2.0, "text": "a"},
+        {"start": 2.0, "end": 4.5, "text": "b"},
+    ]
+    committed, partial = window.advance(segments)
+    assert [segment["text"] for segment in committed] == ["a"]
+    assert [segment["text"] for segment in partial] == ["b"]
+    # Audio up to the end of the committed segment is released.
+    assert window.offset_seconds == 2.0
+    assert len(window.audio) == 25
+
+    window.feed(np.zeros(40, dtype=np.float32))
+    committed, _ = window.advance([{"start": 2.0, "end": 8.5, "text": "b c"}])
+    assert committed[0]["text"] == "b c"
+    assert len(window.audio) == 0
+    assert window.offset_seconds == 8.5
@@ -0,0 +1,147 @@
+import pytest
+
+from app.btec_engine.text_evaluator import (
+    evaluate_text,
+    evaluate_text_batch,
+    evaluate_text_bounded,
+    evaluate_text_cascade,
+    evaluate_text_segments,
+    match_segments,
+    split_segments,
+)
+
+
+def test_evaluate_text_batch_matches_single_evaluation() -> None:
+    model_answer = "Photosynthesis converts light energy into chemical energy."
+    student_answers = [
+        "Photosynthesis turns light energy into chemical energy.",
+        "",
+        model_answer,
+        "Plants need water.",
+    ]
+    results = evaluate_text_batch(student_answers, model_answer)
+    assert len(results) == len(student_answers)
+    for answer, result in zip(student_answers, results, strict=True):
+        expected = evaluate_text(answer, model_answer)
+        assert result["similarity"] == pytest.approx(expected["similarity"])
+        assert result["levenshtein_ratio"] == pytest.approx(
+            expected["levenshtein_ratio"]
+        )
+
+
+def test_evaluate_text_batch_empty() -> None:
+    assert evaluate_text_batch([], "model") == []
+
+
+def test_evaluate_text_bounded_exact_above_threshold() -> None:
+    model_answer = "Cash flow forecasts show expected receipts and payments."
+    student_answer = "Cash flow forecasts show the expected receipts and payments."
+    result = evaluate_text_bounded(student_answer, model_answer, 0.5)
+    assert result["exact"] is True
+    assert result["levenshtein_ratio"] == pytest.approx(
+        evaluate_text(student_answer, model_answer)["levenshtein_ratio"]
+    )
+
+
+def test_evaluate_text_bounded_returns_upper_bound_below_threshold() -> None:
+    model_answer = "A short model answer."
+    student_answer = "An unrelated and considerably longer answer " * 20
+    result = evaluate_text_bounded(student_answer, model_answer, 0.9)
+    exact = evaluate_text(student_answer, model_answer)["levenshtein_ratio"]
+    assert result["exact"] is False
+    assert exact <= result["levenshtein_ratio"] < 0.9
+
+
+def test_evaluate_text_batch_with_min_similarity() -> None:
+    model_answer = "Stakeholders include owners, employees and customers."
+    student_answers = [
+        "Stakeholders include owners, employees and customers.",
+        "Completely different.",
+    ]
+    results = evaluate_text_batch(student_answers, model_answer, 0.8)
+    assert results[0]["exact"] is True
+    assert results[0]["levenshtein_ratio"] == pytest.approx(1.0)
+    assert results[1]["exact"] is False
+    assert results[1]["levenshtein_ratio"] <= 0.8
+
+
+def test_evaluate_text_cascade_full_runs_every_metric() -> None:
+    result = evaluate_text_cascade("The cat sat.", "The cat sat down.", "full")
+    assert result["decision"] == "complete"
+    assert [metric["name"] for metric in result["metrics_run"]] == [
+        "length_ratio",
+        "token_jaccard",
+        "similarity",
+        "levenshtein_ratio",
+    ]
+    assert result["similarity"] == pytest.approx(
+        evaluate_text("The cat sat.", "The cat sat down.")["similarity"]
+    )
+
+
+def test_evaluate_text_cascade_fast_stops_on_cheap_metric() -> None:
+    result = evaluate_text_cascade("Yes.", "A long explanation " * 10, "fast")
+    assert result["decision"] == "rejected"
+    assert [metric["name"] for metric in result["metrics_run"]] == ["length_ratio"]
+    assert result["length_ratio"] is not None
+    assert result["token_jaccard"] is None
+    assert result["levenshtein_ratio"] is None
+
+
+def test_evaluate_text_cascade_accept_returns_every_metric_key() -> None:
+    result = evaluate_text_cascade("The cat sat.", "The cat sat.", "fast")
+    assert result["decision"] == "accepted"
+    assert set(result) == {
+        "length_ratio",
+        "token_jaccard",
+        "similarity",
+        "levenshtein_ratio",
+        "profile",
+        "decision",
+        "metrics_run",
+    }
+    assert result["similarity"] is None
+
+
+def test_split_segments() -> None:
+    text = "First point. Second point?\n\nNew paragraph here."
+    assert split_segments(text) == [
+        "First point.",
+        "Second point?",
+        "New paragraph here.",
+    ]
+    assert split_segments(text, "paragraph") == [
+        "First point. Second point?",
+        "New paragraph here.",
+    ]
+
+
+def test_evaluate_text_segments_aligns_in_order() -> None:
+    model_answer = (
+        "Aims are long term goals. Objectives are SMART targets. "
+        "Mission statements describe purpose."
+    )
+    student_answer = (
+        "Aims are long-term goals. I like business. "
+        "Objectives are SMART targets. Mission statements describe the purpose."
+    )
+    result = evaluate_text_segments(student_answer, model_answer)
+    pairs = [
+        (segment["student_index"], segment["model_index"])
+        for segment in result["segments"]
+    ]
+    assert pairs == [(0, 0), (2, 1), (3, 2)]
+    assert result["aggregate"]["matched_segments"] == 3
+    assert 0.9 < result["aggregate"]["coverage"] <= 1.0
+
+
+def test_match_segments_picks_closest_model_sentence() -> None:
+    model = "Energy is conserved. Momentum is also conserved."
+    matches = match_segments(
+        ["momentum is also conserved", "energy is conserved"], model
+    )
+    assert [match["model_index"] for match in matches] == [1, 0]
+    assert all(0 < match["levenshtein_ratio"] <= 1 for match in matches)
+    assert match_segments(["anything"], "") == [
+        {"model_index": None, "levenshtein_ratio": 0.0}
+    ]
@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.btec_engine.whisper_models import WhisperModelManager, default_torch_threads
+
+
+def test_model_is_loaded_once_on_first_use() -> None:
+    whisper_mock = MagicMock()
+    manager = WhisperModelManager()
+
+    with patch.dict("sys.modules", {"whisper": whisper_mock}):
+        assert manager.stats()["models"] == {}
+        first = manager.get("base")
+        second = manager.get("base")
+
+    assert first is second
+    whisper_mock.load_model.assert_called_once_with("base")
+    stats = manager.stats()
+    assert set(stats["models"]) == {"base"}
+    assert stats["models"]["base"]["load_seconds"] >= 0
+    assert stats["resident_bytes"] > 0
+
+
+def test_default_torch_threads_split_cores() -> None:
+    with patch("os.cpu_count", return_value=16):
+        assert default_torch_threads(4) == 4
+        assert default_torch_threads(32) == 1
+
+
+def test_configured_manager_quantizes_linear_layers() -> None:
+    torch = pytest.importorskip("torch")
+
+    class CastingLinear(torch.nn.Linear):
+        pass
+
+    class TinyModel(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.proj = CastingLinear(8, 8)
+            self.norm = torch.nn.LayerNorm(8)
+
+        @property
+        def device(self) -> "torch.device":
+            return self.norm.weight.device
+
+    whisper_mock = MagicMock()
+    whisper_mock.load_model.return_value = TinyModel()
+    manager = WhisperModelManager()
+    manager.configure(quantize=True, threads=1)
+
+    with patch.dict("sys.modules", {"whisper": whisper_mock}):
+        model = manager.get("base")
+        profile = manager.profile("base")
+
+    assert isinstance(model.proj, torch.ao.nn.quantized.dynamic.Linear)
+    assert profile == {
+        "model": "base",
+        "device": "cpu",
+        "quantization": "int8",
+        "torch_threads": 1,
+    }
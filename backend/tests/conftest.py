@@ -7,7 +7,15 @@ from sqlmodel import Session, delete
 from app.core.config import settings
 from app.core.db import engine, init_db
 from app.main import app
-from app.models import Item, User
+from app.models import (
+    Evaluation,
+    Item,
+    ModelAnswer,
+    ReportBatch,
+    StoredReport,
+    TranscriptionJob,
+    User,
+)
 from tests.utils.user import authentication_token_from_email
 from tests.utils.utils import get_superuser_token_headers
 
@@ -17,6 +25,16 @@ def db() -> Generator[Session, None, None]:
     with Session(engine) as session:
         init_db(session)
         yield session
+        statement = delete(StoredReport)
+        session.execute(statement)
+        statement = delete(ReportBatch)
+        session.execute(statement)
+        statement = delete(TranscriptionJob)
+        session.execute(statement)
+        statement = delete(Evaluation)
+        session.execute(statement)
+        statement = delete(ModelAnswer)
+        session.execute(statement)
         statement = delete(Item)
         session.execute(statement)
         statement = delete(User)
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.core.batching import MicroBatcher, SingleFlight
+
+
+def test_micro_batcher_groups_concurrent_requests() -> None:
+    batches: list[list[int]] = []
+
+    async def run_batch(items: list[int]) -> list[object]:
+        batches.append(items)
+        return [ValueError("odd") if item % 2 else item * 10 for item in items]
+
+    batcher = MicroBatcher(run_batch, max_batch_size=3, max_wait_seconds=0.05)
+
+    async def main() -> list[object]:
+        return await asyncio.gather(
+            *(batcher.submit(item) for item in range(4)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert batches == [[0, 1, 2], [3]]
+    assert results[0] == 0
+    assert results[2] == 20
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[3], ValueError)
+
+    stats = batcher.stats()
+    assert stats["batch_size_histogram"] == {"1": 1, "3": 1}
+    assert stats["wait_seconds_histogram"]["+Inf"] == 4
+
+
+def test_micro_batcher_propagates_batch_failure() -> None:
+    async def run_batch(_items: list[int]) -> list[int]:
+        raise RuntimeError("pool down")
+
+    batcher = MicroBatcher(run_batch, max_batch_size=8, max_wait_seconds=0.01)
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.submit(1))
+
+
+def test_micro_batcher_fails_a_batch_with_missing_results() -> None:
+    async def run_batch(items: list[int]) -> list[int]:
+        return items[:-1]
+
+    async def main() -> None:
+        batcher = MicroBatcher(run_batch, max_batch_size=8, max_wait_seconds=0.01)
+        with pytest.raises(RuntimeError):
+            await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    asyncio.run(main())
+
+
+def test_single_flight_shares_one_call() -> None:
+    flights = SingleFlight()
+    calls = []
+
+    async def transcribe() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "hello"
+
+    async def main() -> list[str]:
+        first = asyncio.ensure_future(flights.run("same-audio", transcribe))
+        await asyncio.sleep(0)
+        assert "same-audio" in flights
+        results = await asyncio.gather(
+            first, *(flights.run("same-audio", transcribe) for _ in range(2))
+        )
+        assert "same-audio" not in flights
+        return results
+
+    assert asyncio.run(main()) == ["hello"] * 3
+    assert calls == [1]
+    assert flights.stats() == {"in_flight": 0, "started": 1, "deduplicated": 2}
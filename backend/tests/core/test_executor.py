@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.executor import EvaluationPool, PoolSaturatedError
+
+
+def test_evaluation_pool_runs_and_reports_stats() -> None:
+    pool = EvaluationPool(workers=1, max_queue=4)
+    pool.start()
+    try:
+        result = asyncio.run(pool.run(divmod, 7, 3))
+    finally:
+        pool.shutdown()
+    assert result == (2, 1)
+    stats = pool.stats()
+    assert stats["completed"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["wait_seconds"]["max"] >= 0.0
+
+
+def test_evaluation_pool_rejects_when_queue_full() -> None:
+    pool = EvaluationPool(workers=1, max_queue=0)
+
+    async def submit_two() -> None:
+        await asyncio.gather(pool.run(time.sleep, 0.5), pool.run(time.sleep, 0.5))
+
+    pool.start()
+    try:
+        with pytest.raises(PoolSaturatedError):
+            asyncio.run(submit_two())
+    finally:
+        pool.shutdown()
+    assert pool.stats()["rejected"] == 1
@@ -0,0 +1,48 @@
+import csv
+import io
+import zipfile
+
+import pytest
+
+from app.core.exports import iter_csv, iter_xlsx
+
+
+def test_iter_csv_flushes_in_chunks() -> None:
+    chunks = list(iter_csv(["id", "name"], [(1, "a"), (2, "طالب")], flush_rows=1))
+    assert len(chunks) == 3
+    text = b"".join(chunks).decode("utf-8-sig")
+    assert list(csv.reader(io.StringIO(text))) == [
+        ["id", "name"],
+        ["1", "a"],
+        ["2", "طالب"],
+    ]
+
+
+def test_iter_csv_quotes_formula_cells() -> None:
+    rows = [('=HYPERLINK("x")', "+1", "-2", "@SUM(A1)", "a-b", -0.5)]
+    text = b"".join(iter_csv(["a", "b", "c", "d", "e", "f"], rows))
+    assert list(csv.reader(io.StringIO(text.decode("utf-8-sig"))))[1] == [
+        '\'=HYPERLINK("x")',
+        "'+1",
+        "'-2",
+        "'@SUM(A1)",
+        "a-b",
+        "-0.5",
+    ]
+
+
+def test_iter_xlsx_streams_a_readable_workbook() -> None:
+    rows = ((n, None, f"student <{n}>", n / 4, n % 2 == 0) for n in range(5000))
+    chunks = list(
+        iter_xlsx(["n", "note", "name", "score", "even"], rows, flush_bytes=1024)
+    )
+    assert len(chunks) > 2
+    data = b"".join(chunks)
+    assert zipfile.ZipFile(io.BytesIO(data)).testzip() is None
+
+    openpyxl = pytest.importorskip("openpyxl")
+    sheet = openpyxl.load_workbook(io.BytesIO(data), read_only=True).active
+    values = list(sheet.iter_rows(values_only=True))
+    assert values[0] == ("n", "note", "name", "score", "even")
+    assert values[3] == (2, None, "student <2>", 0.5, True)
+    assert len(values) == 5001
@@ -0,0 +1,164 @@
+import asyncio
+import zipfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.executor import report_pool
+from app.core.reports import (
+    ReportBatchRunner,
+    follow_file,
+    report_content_hash,
+    report_filename,
+    write_archive,
+)
+
+
+def fake_render(html_content: str, output_path: str) -> None:
+    if "fail" in html_content:
+        raise ValueError("bad template")
+    Path(output_path).write_bytes(b"%PDF-1.7\n" + html_content.encode())
+
+
+def test_report_filename_is_safe() -> None:
+    assert report_filename("student-01") == "student-01.pdf"
+    assert report_filename("../../etc/passwd") == ".._.._etc_passwd.pdf"
+
+
+def test_write_archive_collects_pdfs(tmp_path: Path) -> None:
+    (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF b")
+    (tmp_path / "notes.txt").write_text("skip")
+
+    with zipfile.ZipFile(write_archive(str(tmp_path))) as archive:
+        assert archive.namelist() == ["a.pdf", "b.pdf"]
+
+
+def test_runner_renders_batch_and_records_progress(
+    db: Session, tmp_path: Path
+) -> None:
+    batch = crud.create_report_batch(
+        session=db, student_ids=["s1", "s2", "s3"], output_root=str(tmp_path)
+    )
+    runner = ReportBatchRunner(store_dir=str(tmp_path / "store"), progress_seconds=0)
+
+    async def main() -> None:
+        report_pool.start()
+        try:
+            runner.submit(
+                batch.id,
+                batch.output_dir,
+                [("s1", "<p>one</p>"), ("s2", "fail"), ("s3", "<p>three</p>")],
+                True,
+                fake_render,
+            )
+            await asyncio.gather(*runner._tasks.values())
+        finally:
+            report_pool.shutdown()
+
+    asyncio.run(main())
+    db.refresh(batch)
+    assert batch.status == "done"
+    assert (batch.completed, batch.failed) == (2, 1)
+    assert batch.finished_at is not None
+    assert batch.archive_path
+    assert batch.student_ids == ["s1", "s2", "s3"]
+    with zipfile.ZipFile(batch.archive_path) as archive:
+        assert archive.namelist() == ["s1.pdf", "s3.pdf"]
+
+
+def test_stale_running_batches_are_marked_failed(db: Session, tmp_path: Path) -> None:
+    stale = crud.create_report_batch(
+        session=db, student_ids=["s1"], output_root=str(tmp_path)
+    )
+    live = crud.create_report_batch(
+        session=db, student_ids=["s2"], output_root=str(tmp_path)
+    )
+    crud.update_report_batch(
+        session=db,
+        batch_id=stale.id,
+        heartbeat_at=datetime.now(timezone.utc) - timedelta(minutes=5),
+    )
+
+    fail_stale = crud.fail_stale_report_batches
+    assert fail_stale(session=db, lease_seconds=60, batch_id=live.id) == 0
+    assert fail_stale(session=db, lease_seconds=60) == 1
+    db.refresh(stale)
+    db.refresh(live)
+    assert (stale.status, live.status) == ("failed", "running")
+    assert stale.error and stale.finished_at is not None
+
+
+def test_follow_file_reads_until_the_writer_is_done(tmp_path: Path) -> None:
+    path = tmp_path / "growing.pdf"
+    path.touch()
+
+    async def main() -> bytes:
+        async def write() -> None:
+            for part in (b"%PDF", b"-1.7", b"\n%%EOF"):
+                with path.open("ab") as stream:
+                    stream.write(part)
+                await asyncio.sleep(0.02)
+
+        writer = asyncio.ensure_future(write())
+        chunks = [
+            chunk
+            async for chunk in follow_file(str(path), writer, poll_seconds=0.005)
+        ]
+        return b"".join(chunks)
+
+    assert asyncio.run(main()) == b"%PDF-1.7\n%%EOF"
+
+
+def test_report_content_hash_ignores_key_order() -> None:
+    assert report_content_hash({"a": 1, "b": [2]}) == report_content_hash(
+        {"b": [2], "a": 1}
+    )
+    assert report_content_hash({"a": 1}) != report_content_hash({"a": 2})
+    assert report_content_hash("<p>a</p>") != report_content_hash("<p>b</p>")
+
+
+def test_runner_only_renders_changed_reports(db: Session, tmp_path: Path) -> None:
+    runner = ReportBatchRunner(store_dir=str(tmp_path / "store"), progress_seconds=0)
+
+    def run_batch(reports: list[tuple[str, str]], force: bool = False):
+        batch = crud.create_report_batch(
+            session=db,
+            student_ids=[student_id for student_id, _ in reports],
+            output_root=str(tmp_path),
+        )
+
+        async def main() -> None:
+            report_pool.start()
+            try:
+                runner.submit(
+                    batch.id, batch.output_dir, reports, False, fake_render, force
+                )
+                await asyncio.gather(*runner._tasks.values())
+            finally:
+                report_pool.shutdown()
+
+        asyncio.run(main())
+        db.refresh(batch)
+        return batch
+
+    def inode(batch, student_id: str) -> int:
+        return (Path(batch.output_dir) / report_filename(student_id)).stat().st_ino
+
+    first = run_batch([("s1", "<p>one</p>"), ("s2", "<p>two</p>")])
+    assert (first.completed, first.reused) == (2, 0)
+
+    second = run_batch([("s1", "<p>one</p>"), ("s2", "<p>two, revised</p>")])
+    assert (second.status, second.completed, second.reused) == ("done", 2, 1)
+    assert inode(second, "s1") == inode(first, "s1")
+    assert inode(second, "s2") != inode(first, "s2")
+    assert (Path(second.output_dir) / "s2.pdf").read_bytes().endswith(b"revised</p>")
+    # The first batch keeps the PDF it produced.
+    assert (Path(first.output_dir) / "s2.pdf").read_bytes().endswith(b"two</p>")
+    assert len(list((tmp_path / "store").iterdir())) == 2
+
+    forced = run_batch([("s1", "<p>one</p>")], force=True)
+    assert (forced.completed, forced.reused) == (1, 0)
+    assert inode(forced, "s1") != inode(first, "s1")
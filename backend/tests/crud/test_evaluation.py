@@ -0,0 +1,31 @@
+from sqlmodel import Session
+
+from app import crud
+from app.models import ModelAnswerCreate
+
+
+def test_iter_evaluation_rows_filters_by_model_answer(db: Session) -> None:
+    unit_a, unit_b = (
+        crud.create_model_answer(
+            session=db, model_answer_in=ModelAnswerCreate(title=title, text=title)
+        )
+        for title in ("Unit A", "Unit B")
+    )
+    for model_answer, student_ids in ((unit_a, ["s1", "s2"]), (unit_b, [None])):
+        crud.create_evaluations(
+            session=db,
+            model_answer_id=model_answer.id,
+            student_ids=student_ids,
+            results=[
+                {"similarity": 0.5, "levenshtein_ratio": 0.25}
+                for _ in student_ids
+            ],
+        )
+
+    rows = list(
+        crud.iter_evaluation_rows(session=db, model_answer_id=unit_a.id, batch_size=1)
+    )
+    columns = crud.EVALUATION_EXPORT_COLUMNS
+    assert [row[columns.index("student_id")] for row in rows] == ["s1", "s2"]
+    assert all(row[columns.index("model_answer_id")] == unit_a.id for row in rows)
+    assert rows[0][columns.index("similarity")] == 0.5
@@ -0,0 +1,35 @@
+from sqlmodel import Session
+
+from app import crud
+from app.btec_engine.text_evaluator import METRIC_VERSION
+from app.models import ModelAnswerCreate
+
+
+def test_create_model_answer_precomputes_features(db: Session) -> None:
+    model_answer_in = ModelAnswerCreate(
+        title="Unit 3 task 1", text="  Profit  is revenue\nminus costs. "
+    )
+    model_answer = crud.create_model_answer(
+        session=db, model_answer_in=model_answer_in
+    )
+    assert model_answer.normalized_text == "Profit is revenue minus costs."
+    assert model_answer.length == len(model_answer_in.text)
+    assert model_answer.char_counts["s"] == 4
+    assert model_answer.char_counts[" "] == 7
+    assert model_answer.metric_version == METRIC_VERSION
+
+
+def test_get_model_answer_refreshes_stale_features(db: Session) -> None:
+    model_answer = crud.create_model_answer(
+        session=db,
+        model_answer_in=ModelAnswerCreate(title="Unit 3", text="Break-even point"),
+    )
+    model_answer.metric_version = "0"
+    model_answer.char_counts = {}
+    db.add(model_answer)
+    db.commit()
+
+    refreshed = crud.get_model_answer(session=db, model_answer_id=model_answer.id)
+    assert refreshed
+    assert refreshed.metric_version == METRIC_VERSION
+    assert refreshed.char_counts["e"] == 3
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session, delete
+
+from app import crud
+from app.models import TranscriptionJob
+
+
+def test_claim_transcription_job(db: Session) -> None:
+    db.execute(delete(TranscriptionJob))
+    db.commit()
+    job = crud.create_transcription_job(
+        session=db, audio_path="/tmp/a.wav", model_name="base", filename="a.wav"
+    )
+    assert job.status == "queued"
+
+    claimed = crud.claim_transcription_job(session=db, lease_seconds=60)
+    assert claimed
+    assert claimed.id == job.id
+    assert claimed.status == "running"
+    assert claimed.attempts == 1
+    assert crud.claim_transcription_job(session=db, lease_seconds=60) is None
+
+
+def test_claim_reclaims_job_with_expired_lease(db: Session) -> None:
+    db.execute(delete(TranscriptionJob))
+    db.commit()
+    job = crud.create_transcription_job(
+        session=db, audio_path="/tmp/b.wav", model_name="base", filename=None
+    )
+    crud.update_transcription_job(
+        session=db,
+        job_id=job.id,
+        status="running",
+        attempts=1,
+        heartbeat_at=datetime.now(timezone.utc) - timedelta(minutes=10),
+    )
+
+    claimed = crud.claim_transcription_job(session=db, lease_seconds=60)
+    assert claimed
+    assert claimed.id == job.id
+    assert claimed.attempts == 2